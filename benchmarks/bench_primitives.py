@@ -0,0 +1,292 @@
+'''
+Микробенчмарки горячих мест по отдельности: планировщик таймеров, AllSprites.draw, Enemy.collision,
+spritecollide с collide_mask, Bullet.first_hits, Gun.rotate_gun, AnimatedSprite.animate,
+folder_importer и load_json. У примитивов с размером вход растёт от 10 до 10000 объектов,
+чтобы по результатам можно было построить кривые масштабирования.
+Результаты сохраняются по коммиту в benchmarks/results/primitives-<rev>.json.
+
+Запуск из корня проекта:
+    python benchmarks/bench_primitives.py run [--sizes 10 100 1000 10000] [--only timers draw]
+    python benchmarks/bench_primitives.py compare base.json new.json [--threshold 15]
+    python benchmarks/bench_primitives.py history [timers]
+'''
+import argparse
+import glob
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from os.path import join, dirname, abspath
+
+# bench_scenarios включает dummy-драйверы SDL и добавляет game/ в sys.path
+from bench_scenarios import start_gameplay, git_rev, RESULTS_DIR, DT
+
+from settings import *
+from support import Scheduler, folder_importer, load_json, frame_cache, rng
+from config import config
+from sprites import Sprite, AnimatedSprite, Bullet
+from main import Game
+
+SIZES = (10, 100, 1000, 10000)
+REPEATS = 5
+MIN_TIME = 0.05  # секунд на один повтор, число вызовов подбирается под него
+
+
+# ===== primitives =====
+# каждая функция готовит вход размера n и возвращает вызов, который замеряется;
+# примитивы без размера получают n=None
+
+def timers(game, n):
+    '''n повторяющихся таймеров с разными интервалами, один кадр advance'''
+    now = [0]
+    scheduler = Scheduler(time_source=lambda: now[0])
+    random = rng.get('bench')
+    for _ in range(n):
+        scheduler.schedule(random.randint(100, 5000), lambda: None, repeat=True)
+
+    def call():
+        now[0] += 16
+        scheduler.advance(now[0])
+    return call
+
+
+def scatter(game, n, surf, area=(3000, 3000)):
+    '''n спрайтов вне групп в случайных точках area'''
+    random = rng.get('bench')
+    return [Sprite((), (random.uniform(0, area[0]), random.uniform(0, area[1])), surf) for _ in range(n)]
+
+
+def draw(game, n):
+    '''сортировка по y и отрисовка n спрайтов, половина из них - земля'''
+    group = type(game.all_sprites)()
+    surf = game.normal_enemy_frames['0']
+    for index, sprite in enumerate(scatter(game, n, surf)):
+        if index % 2:
+            sprite.ground = True
+        group.add(sprite)
+    return lambda: group.draw((1500, 1500))
+
+
+def enemy_collision(game, n):
+    '''Enemy.collision по n препятствиям, примерно десятая часть задевает хитбокс'''
+    enemy = game.enemy_sprites.sprites()[0]
+    enemy.direction.update(1, 0)
+    obstacles = scatter(game, n, pygame.Surface((64, 64)), area=(640, 640))
+    center = enemy.hitbox_rect.center
+
+    def call():
+        enemy.hitbox_rect.center = center
+        enemy.collision('horizontal', obstacles)
+    return call
+
+
+def targets(game, n):
+    '''n целей с масками и хитбоксами вокруг одной пули'''
+    frames = game.normal_enemy_frames
+    sprites = scatter(game, n, frames['0'], area=(400, 400))
+    for sprite in sprites:
+        sprite.mask = frame_cache.mask(sprite.image)
+        sprite.hitbox_rect = sprite.rect.inflate(-20, -40)
+    bullet = Bullet((), (200, 200), game.current_gun.bullet_surf, pygame.Vector2(1, 0))
+    bullet.previous = (150, 200)
+    bullet.lifetime_timer.cancel()
+    return bullet, sprites
+
+
+def spritecollide_mask(game, n):
+    bullet, sprites = targets(game, n)
+    group = pygame.sprite.Group(sprites)
+    return lambda: pygame.sprite.spritecollide(bullet, group, False, pygame.sprite.collide_mask)
+
+
+def first_hits(game, n):
+    bullet, sprites = targets(game, n)
+    return lambda: bullet.first_hits(sprites)
+
+
+def rotate_gun(game, n):
+    gun = game.current_gun
+
+    def call():
+        gun.player_direction.rotate_ip(7)
+        gun.rotate_gun()
+    return call
+
+
+def animate(game, n):
+    '''один шаг анимации у n врагов, половина смотрит вправо и берёт отражённые кадры'''
+    sprites = [AnimatedSprite((), (0, 0), game.normal_enemy_frames) for _ in range(n)]
+    for index, sprite in enumerate(sprites):
+        sprite.direction = pygame.Vector2(1 if index % 2 else -1, 0)
+
+    def call():
+        for sprite in sprites:
+            sprite.animate(DT)
+    return call
+
+
+def importer(game, n):
+    '''все кадры игрока с диска'''
+    return lambda: folder_importer('images', 'player')
+
+
+def json_read(game, n):
+    '''файл настроек врагов из n записей'''
+    data = {f'enemy_{index}': {'speed': 100, 'damage': 10, 'health': 100} for index in range(n)}
+    path = join(game.tmp_dir, f'enemies_{n}.json')
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    return lambda: load_json(path)
+
+
+PRIMITIVES = {
+    'timers': (timers, True),
+    'draw': (draw, True),
+    'enemy_collision': (enemy_collision, True),
+    'spritecollide_mask': (spritecollide_mask, True),
+    'first_hits': (first_hits, True),
+    'rotate_gun': (rotate_gun, False),
+    'animate': (animate, True),
+    'folder_importer': (importer, False),
+    'load_json': (json_read, True)
+}
+
+
+# ===== measuring =====
+def measure(call):
+    '''лучшее время одного вызова из REPEATS повторов, мкс'''
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            call()
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_TIME:
+            break
+        number *= 2 if elapsed * 10 > MIN_TIME else 10
+
+    best = elapsed / number
+    for _ in range(REPEATS - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            call()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best * 1e6
+
+
+def setup_game(seed):
+    game = Game(headless=True)
+    rng.seed(seed)
+    gameplay = start_gameplay(game)
+    gameplay.wave_settings = config.wave(1)
+    gameplay.spawn_enemy('normal')
+    return game
+
+
+def run(args):
+    names = args.only or list(PRIMITIVES)
+    unknown = [name for name in names if name not in PRIMITIVES]
+    if unknown:
+        sys.exit(f'неизвестные примитивы: {", ".join(unknown)}; есть {", ".join(PRIMITIVES)}')
+
+    rev, dirty = git_rev()
+    report = {
+        'rev': rev,
+        'dirty': dirty,
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'unit': 'us',
+        'primitives': {}
+    }
+
+    game = setup_game(args.seed)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        game.tmp_dir = tmp_dir
+        for name in names:
+            setup, sized = PRIMITIVES[name]
+            results = report['primitives'][name] = {}
+            for n in (args.sizes if sized else (None,)):
+                results[str(n)] = measure(setup(game, n))
+                size = f'n={n}' if n is not None else ''
+                print(f'{name:<20} {size:<8} {results[str(n)]:12.2f} us', flush=True)
+
+    out = args.out or join(RESULTS_DIR, f'primitives-{rev}{"-dirty" if dirty else ""}.json')
+    os.makedirs(dirname(abspath(out)), exist_ok=True)
+    with open(out, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=4)
+    print(f'saved {out}')
+
+
+# ===== reports =====
+def read(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare(args):
+    base, new = read(args.base), read(args.new)
+    print(f'{base["rev"]} -> {new["rev"]}')
+    regressions = []
+    for name, results in new['primitives'].items():
+        for n, value in results.items():
+            old = base['primitives'].get(name, {}).get(n)
+            if old is None:
+                continue
+            percent = (value - old) / old * 100
+            regressed = percent > args.threshold
+            if regressed:
+                regressions.append(name)
+            size = f'n={n}' if n != 'None' else ''
+            print(f'{name:<20} {size:<8} {old:12.2f} -> {value:12.2f} us  {percent:+6.1f}%{"  !" if regressed else ""}')
+
+    if regressions:
+        print(f'\nregressions: {", ".join(sorted(set(regressions)))}')
+        sys.exit(1)
+    print('\nno regressions')
+
+
+def history(args):
+    '''все сохранённые прогоны по дате: строка на коммит, колонка на размер'''
+    reports = sorted((read(path) for path in glob.glob(join(RESULTS_DIR, 'primitives-*.json'))), key=lambda report: report['date'])
+    if not reports:
+        sys.exit(f'нет результатов в {RESULTS_DIR}')
+    for name in args.only or list(PRIMITIVES):
+        sizes = sorted({n for report in reports for n in report['primitives'].get(name, {})}, key=lambda n: (n == 'None', int(n) if n != 'None' else 0))
+        if not sizes:
+            continue
+        print(f'\n{name}, us')
+        print(f'{"rev":<16}' + ''.join(f'{("n=" + n) if n != "None" else "":>14}' for n in sizes))
+        for report in reports:
+            results = report['primitives'].get(name, {})
+            rev = report['rev'] + ('*' if report['dirty'] else '')
+            print(f'{rev:<16}' + ''.join(f'{results[n]:14.2f}' if n in results else f'{"-":>14}' for n in sizes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='микробенчмарки горячих примитивов')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='замерить примитивы и сохранить JSON')
+    run_parser.add_argument('--sizes', type=int, nargs='+', default=SIZES, help='размеры входа')
+    run_parser.add_argument('--only', nargs='+', metavar='PRIMITIVE', help=f'только эти примитивы: {", ".join(PRIMITIVES)}')
+    run_parser.add_argument('--seed', type=int, default=1)
+    run_parser.add_argument('--out', help='файл результатов, по умолчанию benchmarks/results/primitives-<rev>.json')
+    run_parser.set_defaults(func=run)
+
+    compare_parser = commands.add_parser('compare', help='сравнить два файла результатов')
+    compare_parser.add_argument('base')
+    compare_parser.add_argument('new')
+    compare_parser.add_argument('--threshold', type=float, default=15, help='порог замедления, %%')
+    compare_parser.set_defaults(func=compare)
+
+    history_parser = commands.add_parser('history', help='таблица по всем сохранённым коммитам')
+    history_parser.add_argument('only', nargs='*', metavar='PRIMITIVE')
+    history_parser.set_defaults(func=history)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
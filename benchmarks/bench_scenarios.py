@@ -0,0 +1,324 @@
+'''
+Сценарии на настоящей карте gameworld.tmx без окна и звука: пустая карта, 50/200/1000 врагов в погоне,
+спиральный шторм FirstBoss, очередь из пулемёта и простой магазина.
+Каждый сценарий - warmup кадров разогрева, frames кадров с замером времени update + draw
+и отдельный прогон alloc_frames кадров под tracemalloc: сколько памяти выделяется за кадр и сколько остаётся.
+
+Запуск из корня проекта:
+    python benchmarks/bench_scenarios.py run [--frames 600] [--only chase_200 boss_spiral] [--out file.json]
+    python benchmarks/bench_scenarios.py compare base.json new.json [--time 10] [--alloc 25]
+compare печатает изменения по каждому сценарию и завершается с кодом 1, если есть регрессии выше порогов.
+'''
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import argparse
+import gc
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from os.path import join, dirname
+from types import MappingProxyType
+
+sys.path.insert(0, join(dirname(__file__), '..', 'game'))
+
+from settings import *
+from support import rng, Timer
+from config import config, WaveConfig, Multipliers
+from sprites import MachineGun
+from main import Game
+
+RESULTS_DIR = join(dirname(__file__), 'results')
+DT = 1 / FRAMERATE
+
+# метрики, которые сравнивает compare: время кадра - с порогом --time, память - с порогом --alloc
+TIME_METRICS = ('mean_ms', 'p95_ms', 'p99_ms')
+ALLOC_METRICS = ('alloc_kb_per_frame', 'retained_kb')
+
+
+class IdleController:
+    '''игрок стоит на месте и не стреляет'''
+
+    def movement(self, player):
+        return pygame.Vector2()
+
+    def aim(self, gun):
+        return pygame.Vector2(1, 0)
+
+    def fire(self, gun):
+        return False
+
+
+class SpamController(IdleController):
+    '''стоит на месте и стреляет без остановки, поворачиваясь на step градусов за кадр'''
+
+    def __init__(self, step=7):
+        self.direction = pygame.Vector2(1, 0)
+        self.step = step
+
+    def aim(self, gun):
+        self.direction.rotate_ip(self.step)
+        return pygame.Vector2(self.direction)
+
+    def fire(self, gun):
+        return True
+
+
+# ===== scenarios =====
+def start_gameplay(game, controller=None):
+    '''чистый мир и игрок без волны: волну заменяет сам сценарий'''
+    game.reset_game()
+    game.controller = controller or IdleController()
+    game.change_state('gameplay', False)
+    gameplay = game.states['gameplay']
+    gameplay.starting_wave_timer.cancel()
+    # игрок не должен умереть посреди замера
+    game.player.health = game.player.max_health = 10 ** 9
+    return gameplay
+
+
+def spawn(game, gameplay, counts, health=1, boss=False):
+    '''враги сразу на карте; health - множитель здоровья, чтобы цели не кончались'''
+    gameplay.wave_settings = WaveConfig(0, MappingProxyType(counts), Multipliers(1, 1, health), boss)
+    gameplay.boss_wave = boss
+    gameplay.prewarm_pools()
+    for name, count in counts.items():
+        for _ in range(count):
+            gameplay.spawn_enemy(name)
+
+
+def idle_map(game):
+    start_gameplay(game)
+
+
+def chase(count):
+    def scenario(game):
+        gameplay = start_gameplay(game)
+        names = [name for name in game.enemies_frames_dict if name != 'first_boss']
+        counts = {name: count // len(names) + (index < count % len(names)) for index, name in enumerate(names)}
+        spawn(game, gameplay, counts)
+    return scenario
+
+
+def boss_spiral(game):
+    '''FirstBoss стреляет только спиралью и чаще обычного, чтобы на карте всё время были сотни пуль'''
+    gameplay = start_gameplay(game)
+    spawn(game, gameplay, {'first_boss': 1}, health=1000, boss=True)
+    boss = next(iter(game.enemy_sprites))
+    boss.attack_timer.cancel()
+    patterns = config.boss(boss.name)
+    spiral = next(pattern for pattern in patterns.patterns if pattern.kind == 'spiral')
+    game.spiral_timer = Timer(100, True, True, lambda: boss.fire(spiral, patterns.sound))
+
+
+def machine_gun(game):
+    gameplay = start_gameplay(game, SpamController())
+    game.available_weapons[MachineGun.gun_name] = MachineGun
+    game.change_gun(MachineGun.gun_name, sound=False)
+    spawn(game, gameplay, {'heavy': 50}, health=1000)
+
+
+def shop_idle(game):
+    start_gameplay(game)
+    game.change_state('shop', False)
+
+
+SCENARIOS = {
+    'idle_map': idle_map,
+    'chase_50': chase(50),
+    'chase_200': chase(200),
+    'chase_1000': chase(1000),
+    'boss_spiral': boss_spiral,
+    'machine_gun': machine_gun,
+    'shop_idle': shop_idle
+}
+
+
+# ===== measuring =====
+def frame(game):
+    pygame.event.pump()
+    game.update(DT)
+    game.draw()
+
+
+def percentile(values, q):
+    return values[min(int(q * len(values)), len(values) - 1)]
+
+
+def measure_time(game, frames):
+    gc_before = [stats['collections'] for stats in gc.get_stats()]
+    times = []
+    for _ in range(frames):
+        start = time.perf_counter()
+        frame(game)
+        times.append(time.perf_counter() - start)
+    gc_after = [stats['collections'] for stats in gc.get_stats()]
+
+    ordered = sorted(times)
+    return {
+        'mean_ms': sum(times) / len(times) * 1000,
+        'p50_ms': percentile(ordered, 0.5) * 1000,
+        'p95_ms': percentile(ordered, 0.95) * 1000,
+        'p99_ms': percentile(ordered, 0.99) * 1000,
+        'max_ms': ordered[-1] * 1000,
+        'over_budget': sum(seconds > DT for seconds in times),
+        'gc_collections': [after - before for before, after in zip(gc_before, gc_after)]
+    }
+
+
+def measure_alloc(game, frames):
+    '''
+    alloc_kb_per_frame - средний пик памяти внутри кадра сверх памяти на его начало, то есть временные объекты;
+    retained_kb - на сколько выросла память за весь прогон
+    '''
+    tracemalloc.start()
+    start_memory = tracemalloc.get_traced_memory()[0]
+    peaks = []
+    for _ in range(frames):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        frame(game)
+        peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    retained = tracemalloc.get_traced_memory()[0] - start_memory
+    tracemalloc.stop()
+
+    ordered = sorted(peaks)
+    return {
+        'alloc_kb_per_frame': sum(peaks) / len(peaks) / 1024,
+        'alloc_kb_p95': percentile(ordered, 0.95) / 1024,
+        'retained_kb': retained / 1024
+    }
+
+
+def run_scenario(game, name, frames, warmup, alloc_frames, seed):
+    rng.seed(seed)
+    SCENARIOS[name](game)
+    for _ in range(warmup):
+        frame(game)
+    gc.collect()
+
+    result = {'frames': frames}
+    result.update(measure_time(game, frames))
+    if alloc_frames:
+        result.update(measure_alloc(game, alloc_frames))
+    result['objects'] = {
+        'sprites': len(game.all_sprites),
+        'enemies': len(game.enemy_sprites),
+        'bullets': len(game.bullet_sprites),
+        'enemy_bullets': len(game.enemies_bullet_sprites)
+    }
+    return result
+
+
+def git_rev():
+    try:
+        rev = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], capture_output=True, text=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown', False
+    return rev, dirty
+
+
+def run(args):
+    names = args.only or list(SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        sys.exit(f'неизвестные сценарии: {", ".join(unknown)}; есть {", ".join(SCENARIOS)}')
+
+    rev, dirty = git_rev()
+    report = {
+        'rev': rev,
+        'dirty': dirty,
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pygame': pygame.version.ver,
+        'seed': args.seed,
+        'scenarios': {}
+    }
+
+    game = Game(headless=True)
+    for name in names:
+        result = report['scenarios'][name] = run_scenario(game, name, args.frames, args.warmup, args.alloc_frames, args.seed)
+        print(f'{name:<12} mean {result["mean_ms"]:7.2f}  p95 {result["p95_ms"]:7.2f}  p99 {result["p99_ms"]:7.2f}  max {result["max_ms"]:7.2f} ms'
+              f'  alloc {result.get("alloc_kb_per_frame", 0):8.1f} kB/frame  sprites {result["objects"]["sprites"]}', flush=True)
+
+    out = args.out or join(RESULTS_DIR, f'scenarios-{rev}{"-dirty" if dirty else ""}.json')
+    os.makedirs(dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=4)
+    print(f'saved {out}')
+
+
+# ===== compare =====
+def compare(args):
+    with open(args.base, 'r', encoding='utf-8') as f:
+        base = json.load(f)
+    with open(args.new, 'r', encoding='utf-8') as f:
+        new = json.load(f)
+    print(f'{base["rev"]} -> {new["rev"]}')
+
+    thresholds = {metric: args.time for metric in TIME_METRICS}
+    thresholds.update({metric: args.alloc for metric in ALLOC_METRICS})
+    minimums = {metric: args.min_ms for metric in TIME_METRICS}
+    minimums.update({metric: args.min_kb for metric in ALLOC_METRICS})
+
+    regressions = []
+    for name, result in new['scenarios'].items():
+        if name not in base['scenarios']:
+            print(f'{name:<12} нет в {args.base}')
+            continue
+        old = base['scenarios'][name]
+        cells = []
+        for metric, threshold in thresholds.items():
+            if metric not in old or metric not in result:
+                continue
+            delta = result[metric] - old[metric]
+            percent = delta / old[metric] * 100 if old[metric] else 0
+            # маленькие абсолютные изменения - шум, даже если в процентах много
+            regressed = percent > threshold and delta > minimums[metric]
+            if regressed:
+                regressions.append((name, metric, old[metric], result[metric], percent))
+            cells.append(f'{metric} {old[metric]:.2f} -> {result[metric]:.2f} ({percent:+.1f}%){" !" if regressed else ""}')
+        print(f'{name:<12} ' + '  '.join(cells))
+
+    if regressions:
+        print(f'\n{len(regressions)} regressions:')
+        for name, metric, old, value, percent in regressions:
+            print(f'  {name}: {metric} {old:.2f} -> {value:.2f} ({percent:+.1f}%)')
+        sys.exit(1)
+    print('\nno regressions')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='сценарии производительности на gameworld.tmx')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='прогнать сценарии и сохранить JSON')
+    run_parser.add_argument('--frames', type=int, default=600, help='кадров с замером времени')
+    run_parser.add_argument('--warmup', type=int, default=60, help='кадров разогрева перед замером')
+    run_parser.add_argument('--alloc-frames', type=int, default=120, help='кадров под tracemalloc, 0 - без замера памяти')
+    run_parser.add_argument('--seed', type=int, default=1)
+    run_parser.add_argument('--only', nargs='+', metavar='SCENARIO', help=f'только эти сценарии: {", ".join(SCENARIOS)}')
+    run_parser.add_argument('--out', help='файл результатов, по умолчанию benchmarks/results/scenarios-<rev>.json')
+    run_parser.set_defaults(func=run)
+
+    compare_parser = commands.add_parser('compare', help='сравнить два файла результатов')
+    compare_parser.add_argument('base')
+    compare_parser.add_argument('new')
+    compare_parser.add_argument('--time', type=float, default=10, help='порог роста времени кадра, %%')
+    compare_parser.add_argument('--alloc', type=float, default=25, help='порог роста выделений памяти, %%')
+    compare_parser.add_argument('--min-ms', type=float, default=0.1, help='рост времени меньше этого не считается регрессией')
+    compare_parser.add_argument('--min-kb', type=float, default=4, help='рост памяти меньше этого не считается регрессией')
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
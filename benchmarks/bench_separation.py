@@ -0,0 +1,41 @@
+'''
+Замер separation_forces на 500 и 2000 врагах: равномерно по карте, толпой вокруг игрока
+и кучей в несколько клеток, где соседей в клетке больше предела max_neighbours.
+Запуск из корня проекта: python benchmarks/bench_separation.py
+'''
+import sys
+import time
+from os.path import join, dirname
+
+sys.path.insert(0, join(dirname(__file__), '..', 'game'))
+
+import numpy as np
+from swarm import separation_forces
+
+MAP_SIZE = (57 * 64, 48 * 64)
+RADIUS = 48
+REPEATS = 20
+
+
+def scenarios(count, rng):
+    yield 'spread', rng.uniform((0, 0), MAP_SIZE, size=(count, 2))
+    yield 'crowd', rng.normal((1868, 1524), 20 * count ** 0.5, size=(count, 2))
+    yield 'pile', rng.normal((1868, 1524), 60, size=(count, 2))
+
+
+def measure(positions):
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        separation_forces(positions, RADIUS)
+    return (time.perf_counter() - start) / REPEATS * 1000
+
+
+def main():
+    rng = np.random.default_rng(0)
+    for count in (500, 2000):
+        for name, positions in scenarios(count, rng):
+            print(f'{count:>5} enemies  {name:<6}  {measure(positions):7.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
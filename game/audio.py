@@ -0,0 +1,334 @@
+from settings import *
+from dataclasses import dataclass
+from functools import partial
+import os
+
+# категория звуков: (шина громкости, сколько каналов микшера закреплено за категорией)
+# музыка идёт потоком через pygame.mixer.music и каналов не занимает
+CATEGORIES = {
+    'footsteps': ('footsteps', 2),
+    'weapons': ('sfx', 6),
+    'enemies': ('sfx', 4),
+    'player': ('sfx', 2),
+    'ui': ('sfx', 2)
+}
+
+
+@dataclass(frozen=True)
+class SoundRule:
+    category: str
+    priority: int = 1  # при нехватке каналов вытесняется самый старый голос с наименьшим приоритетом
+    limit: int = 0  # сколько копий звука играет одновременно, 0 - сколько влезет в категорию
+    interval: int = 0  # повтор раньше чем через interval мс не играется
+
+
+# звуки без правила получают правило по умолчанию своей шины
+DEFAULT_RULES = {
+    'footsteps': SoundRule('footsteps', limit=1),
+    'sfx': SoundRule('ui')
+}
+
+SOUND_RULES = {
+    'player_damage': SoundRule('player', priority=10, limit=1),
+    'heal': SoundRule('player', priority=6, limit=1),
+
+    'pistol_shot': SoundRule('weapons', priority=3, limit=3, interval=40),
+    'machine-gun_shot': SoundRule('weapons', priority=3, limit=3, interval=60),
+    'shotgun_shot': SoundRule('weapons', priority=4, limit=2),
+    'shotgun_reload': SoundRule('weapons', priority=2, limit=1),
+    'sniper_shot': SoundRule('weapons', priority=5, limit=2),
+    'sniper_reload': SoundRule('weapons', priority=2, limit=1),
+    'gun_swap': SoundRule('weapons', priority=4, limit=1),
+
+    'laser_shot': SoundRule('enemies', priority=3, limit=2, interval=80),
+    'enemy_kill': SoundRule('enemies', priority=2, limit=3, interval=50),
+
+    'hover': SoundRule('ui', priority=2, limit=1, interval=50),
+    'click': SoundRule('ui', priority=5, limit=1),
+    'tick': SoundRule('ui', priority=5, limit=1),
+    'not_money': SoundRule('ui', priority=5, limit=1, interval=200),
+    'buy_gun': SoundRule('ui', priority=5),
+    'skill_upgrade': SoundRule('ui', priority=5)
+}
+
+# декодируются при загрузке, чтобы первый выстрел или попадание не ждали декодера;
+# остальные эффекты декодируются при первом play()
+PRELOAD = ('player_damage', 'pistol_shot', 'enemy_kill', 'laser_shot', 'click', 'hover')
+
+
+class AudioBus:
+    '''
+    Шина громкости. volume задаёт игрок, gain - постоянная подстройка шины.
+    Итоговый level умножается на level родителя и пересчитывается только при изменении volume,
+    подписчики (каналы микшера шины) получают новое значение сразу, а не каждый кадр.
+    '''
+
+    def __init__(self, name, volume=1.0, gain=1.0, parent=None):
+        self.name = name
+        self._volume = volume
+        self.gain = gain
+        self.parent = parent
+        self.children = []
+        self.listeners = []
+        if parent is not None:
+            parent.children.append(self)
+        self.level = self.compute_level()
+
+    def compute_level(self):
+        parent_level = self.parent.level if self.parent is not None else 1.0
+        return self._volume * self.gain * parent_level
+
+    @property
+    def volume(self):
+        return self._volume
+
+    @volume.setter
+    def volume(self, value):
+        if value != self._volume:
+            self._volume = value
+            self.refresh()
+
+    def refresh(self):
+        self.level = self.compute_level()
+        for listener in self.listeners:
+            listener(min(self.level, 1.0))
+        for child in self.children:
+            child.refresh()
+
+    def subscribe(self, listener):
+        '''listener(level) вызывается сразу и потом при каждом изменении громкости'''
+        self.listeners.append(listener)
+        listener(min(self.level, 1.0))
+
+
+class MusicPlayer:
+    '''
+    Музыка потоком с диска через pygame.mixer.music - в памяти только буфер декодера, а не весь трек.
+    Поток один, поэтому переход между треками - затухание старого и нарастание нового за fade мс;
+    громкость двигается в update() только пока идёт переход.
+    Трек без файла не ломает игру: одно предупреждение и тишина до следующего трека.
+    '''
+
+    def __init__(self, bus, fade=1000):
+        self.tracks = {}  # имя -> путь
+        self.fade = fade
+        self.current = None  # играющий трек
+        self.target = None  # трек, который должен играть после перехода
+        self.fade_level = 1.0
+        self.fading = 0  # -1 затухание, 1 нарастание
+        self.missing = set()
+        self.level = 1.0
+        bus.subscribe(self.set_level)
+
+    def scan(self, path):
+        for file_name in sorted(os.listdir(path)):
+            if os.path.isfile(join(path, file_name)):
+                self.tracks[file_name.split('.')[0]] = join(path, file_name)
+
+    def set_level(self, level):
+        self.level = level
+        self.apply_volume()
+
+    def apply_volume(self):
+        if pygame.mixer.get_init():
+            pygame.mixer.music.set_volume(self.level * self.fade_level)
+
+    def play(self, name):
+        if name == self.target:
+            return
+        if name not in self.tracks:
+            if name not in self.missing:
+                print(f'music: нет трека "{name}"')
+                self.missing.add(name)
+            name = None
+        self.target = name
+        if name is not None and name == self.current:
+            # вернулись к треку, который ещё затухает - просто возвращаем громкость
+            self.fading = 1
+        elif self.current is None:
+            self.start(name)
+        else:
+            self.fading = -1
+
+    def start(self, name):
+        self.current = None
+        self.fading = 0
+        if name is None or not pygame.mixer.get_init():
+            return
+        try:
+            pygame.mixer.music.load(self.tracks[name])
+        except pygame.error as error:
+            print(f'music: не удалось открыть "{name}": {error}')
+            self.missing.add(name)
+            del self.tracks[name]
+            return
+        self.fade_level = 0.0
+        self.apply_volume()
+        pygame.mixer.music.play(loops=-1)
+        self.current = name
+        self.fading = 1
+
+    def update(self, dt):
+        if not self.fading:
+            return
+        self.fade_level += self.fading * dt * 1000 / self.fade
+        if self.fade_level <= 0:
+            self.fade_level = 0.0
+            pygame.mixer.music.stop()
+            self.start(self.target)
+        elif self.fade_level >= 1:
+            self.fade_level = 1.0
+            self.fading = 0
+        self.apply_volume()
+
+
+class Audio:
+    '''
+    Все звуки игры. Каждый эффект декодируется один раз - при первом play() или заранее через preload(),
+    играет только на каналах своей категории,
+    громкость каналов выставляют шины. Число каналов постоянно, поэтому сколько бы событий
+    ни пришло за кадр, микшер смешивает не больше sum(CATEGORIES) голосов.
+    Без аудиоустройства звуки не грузятся и play() ничего не делает.
+    '''
+
+    def __init__(self, categories=CATEGORIES, rules=SOUND_RULES):
+        self.master = AudioBus('master')
+        self.buses = {
+            'master': self.master,
+            'music': AudioBus('music', gain=1.5, parent=self.master),
+            'sfx': AudioBus('sfx', gain=1.5, parent=self.master)
+        }
+        self.buses['footsteps'] = AudioBus('footsteps', gain=5, parent=self.buses['sfx'])
+        self.music = MusicPlayer(self.buses['music'])
+
+        self.categories = categories
+        self.rules = rules
+        self.channels = {}  # категория -> каналы
+        self.files = {}  # имя -> (путь, SoundRule)
+        self.sounds = {}  # имя -> декодированный Sound
+        self.missing = set()
+        self.voices = {}  # канал -> (имя, приоритет, время запуска)
+        self.last_played = {}
+
+        # stats
+        self.played = 0
+        self.coalesced = 0
+        self.stolen = 0
+        self.dropped = 0
+
+    @property
+    def enabled(self):
+        return pygame.mixer.get_init() is not None
+
+    def init(self):
+        '''раздаёт каналы микшера категориям, вызывается после pygame.init()'''
+        if self.channels or not self.enabled:
+            return
+        total = sum(count for _, count in self.categories.values())
+        pygame.mixer.set_num_channels(total)
+        # все каналы закреплены, чтобы Sound.play() в обход категорий не занимал их
+        pygame.mixer.set_reserved(total)
+
+        index = 0
+        for category, (bus, count) in self.categories.items():
+            channels = [pygame.mixer.Channel(i) for i in range(index, index + count)]
+            index += count
+            self.channels[category] = channels
+            self.buses[bus].subscribe(partial(self.set_channels_volume, channels))
+
+    @staticmethod
+    def set_channels_volume(channels, level):
+        for channel in channels:
+            channel.set_volume(level)
+
+    # ===== loading =====
+    def load_folder(self, path, bus):
+        '''регистрирует звуки из папки (без подпапок) на шине bus без декодирования, возвращает их имена'''
+        names = []
+        for file_name in sorted(os.listdir(path)):
+            full_path = join(path, file_name)
+            if not os.path.isfile(full_path):
+                continue
+            name = file_name.split('.')[0]
+            self.files.setdefault(name, (full_path, self.rules.get(name, DEFAULT_RULES[bus])))
+            names.append(name)
+        return names
+
+    def preload(self, names):
+        for name in names:
+            self.get_sound(name)
+
+    def get_sound(self, name):
+        '''декодированный звук или None, если файла нет'''
+        sound = self.sounds.get(name)
+        if sound is None and self.enabled and name not in self.missing:
+            try:
+                sound = self.sounds[name] = pygame.mixer.Sound(self.files[name][0])
+            except (KeyError, pygame.error, FileNotFoundError) as error:
+                print(f'audio: нет звука "{name}": {error}')
+                self.missing.add(name)
+        return sound
+
+    # ===== playback =====
+    def play(self, name, loops=0):
+        '''играет звук по его правилу, возвращает канал или None, если звук отброшен'''
+        sound = self.get_sound(name)
+        if sound is None:
+            return None
+        rule = self.files[name][1]
+
+        now = pygame.time.get_ticks()
+        last = self.last_played.get(name)
+        if rule.interval and last is not None and now - last < rule.interval:
+            self.coalesced += 1
+            return None
+
+        channel = self.pick_channel(name, rule)
+        if channel is None:
+            self.dropped += 1
+            return None
+        if channel.get_busy():
+            self.stolen += 1
+
+        channel.play(sound, loops)
+        self.voices[channel] = (name, rule.priority, now)
+        self.last_played[name] = now
+        self.played += 1
+        return channel
+
+    def pick_channel(self, name, rule):
+        '''
+        свободный канал категории; если копий звука уже limit - самая старая копия;
+        если категория занята - самый старый голос с приоритетом не выше нового, иначе None
+        '''
+        free = None
+        copies = []
+        victim = None
+        for channel in self.channels[rule.category]:
+            if not channel.get_busy():
+                free = free or channel
+                continue
+            voice_name, priority, started = self.voices.get(channel, (None, 0, 0))
+            if voice_name == name:
+                copies.append((started, channel))
+            if victim is None or (priority, started) < victim[0]:
+                victim = ((priority, started), channel)
+
+        if rule.limit and len(copies) >= rule.limit:
+            return min(copies, key=lambda copy: copy[0])[1]
+        if free is not None:
+            return free
+        if victim is not None and victim[0][0] <= rule.priority:
+            return victim[1]
+        return None
+
+    def stats(self):
+        return {
+            'played': self.played,
+            'coalesced': self.coalesced,
+            'stolen': self.stolen,
+            'dropped': self.dropped,
+            'voices': sum(channel.get_busy() for channels in self.channels.values() for channel in channels)
+        }
+
+audio = Audio()
@@ -0,0 +1,129 @@
+'''
+Монте-Карло прогон волн из settings/waves.json: каждая волна отдельно, много сидов, несколько уровней бота.
+Прогоны раскидываются по ядрам через ProcessPoolExecutor, в каждом процессе одна Game переиспользуется.
+Запуск из корня проекта: python game/balancer.py --waves 1-10 --runs 20 --skill 0.5 1.0 --out report.csv
+'''
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import argparse
+import csv
+import json
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from settings import *
+from config import config
+import headless
+
+_game = None
+
+
+def init_worker():
+    global _game
+    _game = headless.Game(headless=True)
+
+
+def simulate(job):
+    wave, skill, seed, dt, time_limit = job
+    summary = headless.play(_game, start_wave=wave, dt=dt, skill=skill, seed=seed, time_limit=time_limit)[0]
+    summary['skill'] = skill
+    summary['seed'] = seed
+    return summary
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(int(q * len(values)), len(values) - 1)]
+
+
+def aggregate(summaries):
+    '''сводка по каждой паре (волна, skill): доля пройденных, распределения времени и урона'''
+    groups = {}
+    for summary in summaries:
+        groups.setdefault((summary['wave'], summary['skill']), []).append(summary)
+
+    rows = []
+    for (wave, skill), runs in sorted(groups.items()):
+        cleared = [run for run in runs if run['cleared']]
+        times = [run['time_to_clear'] for run in cleared]
+        damage = [run['damage_taken'] for run in runs]
+        rows.append({
+            'wave': wave,
+            'skill': skill,
+            'runs': len(runs),
+            'clear_rate': round(len(cleared) / len(runs), 3),
+            'time_mean': round(sum(times) / len(times), 2) if times else None,
+            'time_p50': percentile(times, 0.5),
+            'time_p90': percentile(times, 0.9),
+            'damage_mean': round(sum(damage) / len(damage), 1),
+            'damage_p50': percentile(damage, 0.5),
+            'damage_p90': percentile(damage, 0.9),
+            'damage_max': max(damage),
+            'peak_enemies': max(run['peaks']['enemies'] for run in runs),
+            'peak_enemy_bullets': max(run['peaks']['enemy_bullets'] for run in runs)
+        })
+    return rows
+
+
+def parse_waves(text, total):
+    '''"3", "1-10" или "all"'''
+    if text == 'all':
+        return list(range(1, total + 1))
+    if '-' in text:
+        first, last = text.split('-')
+        return list(range(int(first), min(int(last), total) + 1))
+    return [int(text)]
+
+
+def write_report(path, rows, runs, run_config):
+    if path.endswith('.csv'):
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'config': run_config, 'summary': rows, 'runs': runs}, f, ensure_ascii=False, indent=4)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Монте-Карло балансировка волн на headless-прогонах')
+    parser.add_argument('--waves', default='all', help='"all", номер волны или диапазон "1-10"')
+    parser.add_argument('--runs', type=int, default=10, help='прогонов на каждую волну и skill')
+    parser.add_argument('--skill', type=float, nargs='+', default=[1.0])
+    parser.add_argument('--seed', type=int, default=0, help='сид первого прогона, дальше seed+1, seed+2...')
+    parser.add_argument('--dt', type=float, default=1 / FRAMERATE)
+    parser.add_argument('--time-limit', type=float, default=300)
+    parser.add_argument('--workers', type=int, default=None, help='по умолчанию все ядра')
+    parser.add_argument('--out', help='файл отчёта, .json или .csv')
+    args = parser.parse_args()
+
+    waves = parse_waves(args.waves, len(config.waves))
+    # одинаковые сиды для всех волн и уровней - результаты можно сравнивать попарно
+    jobs = [(wave, skill, args.seed + run, args.dt, args.time_limit) for wave in waves for skill in args.skill for run in range(args.runs)]
+
+    start = time.perf_counter()
+    summaries = []
+    with ProcessPoolExecutor(args.workers, initializer=init_worker) as executor:
+        for summary in executor.map(simulate, jobs, chunksize=max(len(jobs) // (8 * (args.workers or os.cpu_count())), 1)):
+            summaries.append(summary)
+            print(f'\r{len(summaries)}/{len(jobs)} runs', end='', file=sys.stderr, flush=True)
+    elapsed = time.perf_counter() - start
+    print(f'\r{len(jobs)} runs in {elapsed:.1f} s', file=sys.stderr)
+
+    rows = aggregate(summaries)
+    for row in rows:
+        print(json.dumps(row))
+
+    if args.out:
+        run_config = {'waves': waves, 'runs': args.runs, 'skill': args.skill, 'seed': args.seed, 'dt': args.dt, 'time_limit': args.time_limit}
+        write_report(args.out, rows, summaries, run_config)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,249 @@
+from settings import *
+from dataclasses import dataclass
+from types import MappingProxyType
+import json
+import os
+from patterns import BossPatterns, build_boss_patterns
+
+SETTINGS_FILES = {
+    'enemies': join('settings', 'enemy_settings.json'),
+    'guns': join('settings', 'gun_settings.json'),
+    'waves': join('settings', 'waves.json'),
+    'bosses': join('settings', 'boss_patterns.json')
+}
+
+
+class ConfigError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class EnemyConfig:
+    name: str
+    speed: int
+    damage: float
+    health: float
+
+
+@dataclass(frozen=True)
+class GunConfig:
+    name: str
+    cooldown: int
+    damage_multiplier: float
+    description: str
+    price: int
+
+
+@dataclass(frozen=True)
+class Multipliers:
+    speed: float
+    damage: float
+    health: float
+
+
+@dataclass(frozen=True)
+class WaveConfig:
+    number: int
+    enemies: MappingProxyType  # имя врага -> количество, в порядке из файла
+    multipliers: Multipliers
+    boss: bool = False
+
+
+@dataclass(frozen=True)
+class Config:
+    enemies: MappingProxyType
+    guns: MappingProxyType
+    base_damage: int
+    waves: tuple
+    bosses: MappingProxyType
+
+
+# ===== loading =====
+def require(data, key, kind, where):
+    if key not in data:
+        raise ConfigError(f'{where}: нет поля "{key}"')
+    value = data[key]
+    if not isinstance(value, kind) or isinstance(value, bool) and kind is not bool:
+        names = ' или '.join(k.__name__ for k in (kind if isinstance(kind, tuple) else (kind,)))
+        raise ConfigError(f'{where}: поле "{key}" должно быть {names}, а не {value!r}')
+    return value
+
+
+def parse_enemies(data):
+    enemies = {}
+    for name, info in data.items():
+        where = f'enemy_settings.json: {name}'
+        # скорость целая: Enemy.setup разбрасывает её через randint
+        enemies[name] = EnemyConfig(
+            name,
+            require(info, 'speed', int, where),
+            require(info, 'damage', (int, float), where),
+            require(info, 'health', (int, float), where)
+        )
+    return enemies
+
+
+def parse_guns(data):
+    guns = {}
+    for name, info in data.items():
+        if name == 'base_damage':
+            continue
+        where = f'gun_settings.json: {name}'
+        guns[name] = GunConfig(
+            name,
+            require(info, 'cooldown', int, where),
+            require(info, 'damage_multiplier', (int, float), where),
+            require(info, 'description', str, where),
+            require(info, 'price', int, where)
+        )
+    return guns
+
+
+def parse_waves(data, enemies):
+    waves = []
+    for number in range(1, len(data) + 1):
+        where = f'waves.json: {number}'
+        if str(number) not in data:
+            raise ConfigError(f'{where}: волны должны идти подряд с 1')
+        info = data[str(number)]
+        counts = require(info, 'enemies', dict, where)
+        for name, count in counts.items():
+            if name not in enemies:
+                raise ConfigError(f'{where}: неизвестный враг "{name}"')
+            if not isinstance(count, int) or count < 0:
+                raise ConfigError(f'{where}: количество "{name}" должно быть целым >= 0')
+        multipliers = require(info, 'enemies_multiplier', dict, where)
+        waves.append(WaveConfig(
+            number,
+            MappingProxyType(dict(counts)),
+            Multipliers(*(require(multipliers, key, (int, float), where) for key in ('speed', 'damage', 'health'))),
+            require(info, 'boss', bool, where) if 'boss' in info else False
+        ))
+    return tuple(waves)
+
+
+def parse_bosses(data, enemies, required=()):
+    '''required - враги с boss = True в sprites.ENEMIES, у каждого должна быть запись'''
+    for name in required:
+        if name not in data:
+            raise ConfigError(f'boss_patterns.json: нет паттернов босса "{name}"')
+    bosses = {}
+    for name, info in data.items():
+        where = f'boss_patterns.json: {name}'
+        if name not in enemies:
+            raise ConfigError(f'{where}: неизвестный враг "{name}"')
+        try:
+            bosses[name] = build_boss_patterns(name, info)
+        except KeyError as error:
+            raise ConfigError(f'{where}: нет поля {error}') from error
+        except ValueError as error:
+            raise ConfigError(f'{where}: {error}') from error
+        if not bosses[name].patterns:
+            raise ConfigError(f'{where}: нет ни одного паттерна')
+        # Boss.attack хранит только залпы последней атаки, следующая атака не должна начаться раньше их конца
+        boss = bosses[name]
+        if boss.volleys * boss.volley_delay >= boss.attack_interval:
+            raise ConfigError(f'{where}: volleys * volley_delay ({boss.volleys * boss.volley_delay}) должно быть меньше attack_interval ({boss.attack_interval})')
+    return bosses
+
+
+def load_config(files=SETTINGS_FILES, bosses=()):
+    '''читает и проверяет все настройки, при ошибке - ConfigError; bosses - имена врагов-боссов'''
+    raw = {}
+    for section, path in files.items():
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                raw[section] = json.load(f)
+        except (OSError, json.JSONDecodeError) as error:
+            raise ConfigError(f'{path}: {error}') from error
+
+    enemies = parse_enemies(raw['enemies'])
+    return Config(
+        MappingProxyType(enemies),
+        MappingProxyType(parse_guns(raw['guns'])),
+        require(raw['guns'], 'base_damage', int, 'gun_settings.json'),
+        parse_waves(raw['waves'], enemies),
+        MappingProxyType(parse_bosses(raw['bosses'], enemies, bosses))
+    )
+
+
+class ConfigRegistry:
+    '''
+    Все настройки врагов, оружия и волн, загруженные один раз в неизменяемые записи.
+    При watch=True poll() между кадрами проверяет время изменения файлов и подменяет
+    весь снимок настроек целиком; если новый файл с ошибкой, остаётся старый снимок.
+    '''
+
+    def __init__(self, files=SETTINGS_FILES, watch=False, poll_interval=0.5):
+        self.files = files
+        self.watch = watch
+        self.poll_interval = poll_interval
+        self.current = None
+        self.mtimes = {}
+        self.since_poll = 0
+        self.bosses = set()  # регистрирует sprites.py, см. require_bosses
+
+    def require_bosses(self, names):
+        '''враги-боссы без записи в boss_patterns.json - ошибка загрузки, а не KeyError при спавне'''
+        self.bosses.update(names)
+
+    def load(self):
+        mtimes = self.read_mtimes()
+        self.current = load_config(self.files, self.bosses)
+        self.mtimes = mtimes
+
+    def read_mtimes(self):
+        return {path: os.stat(path).st_mtime_ns for path in self.files.values() if os.path.exists(path)}
+
+    def poll(self, dt):
+        '''перезагружает настройки, если файлы изменились; возвращает True при подмене'''
+        if not self.watch:
+            return False
+        self.since_poll += dt
+        if self.since_poll < self.poll_interval:
+            return False
+        self.since_poll = 0
+
+        mtimes = self.read_mtimes()
+        if mtimes == self.mtimes:
+            return False
+        self.mtimes = mtimes
+        try:
+            self.current = load_config(self.files, self.bosses)
+        except ConfigError as error:
+            print(f'config reload failed: {error}')
+            return False
+        print('config reloaded')
+        return True
+
+    # ===== lookups =====
+    @property
+    def config(self):
+        if self.current is None:
+            self.load()
+        return self.current
+
+    def enemy(self, name) -> EnemyConfig:
+        return self.config.enemies[name]
+
+    def gun(self, name) -> GunConfig:
+        return self.config.guns[name]
+
+    def boss(self, name) -> BossPatterns:
+        return self.config.bosses[name]
+
+    def wave(self, number) -> WaveConfig:
+        waves = self.config.waves
+        if not 1 <= number <= len(waves):
+            raise IndexError(f'нет волны {number}, в waves.json волны 1..{len(waves)}')
+        return waves[number - 1]
+
+    @property
+    def waves(self):
+        return self.config.waves
+
+    @property
+    def base_damage(self):
+        return self.config.base_damage
+
+config = ConfigRegistry()
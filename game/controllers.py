@@ -0,0 +1,76 @@
+from settings import *
+from support import rng
+from inputs import inputs
+
+
+class KeyboardController:
+    '''обычное управление: WASD для движения, мышь для прицела и стрельбы'''
+
+    def movement(self, player):
+        keys = inputs.get_pressed()
+        return pygame.Vector2(int(keys[pygame.K_d]) - int(keys[pygame.K_a]), int(keys[pygame.K_s]) - int(keys[pygame.K_w]))
+
+    def aim(self, gun):
+        # камера держит игрока в центре экрана
+        mouse_pos = pygame.Vector2(inputs.get_pos())
+        player_pos = pygame.Vector2(WINDOW_WIDTH//2, WINDOW_HEIGHT//2)
+        return (mouse_pos - player_pos).normalize() if mouse_pos != player_pos else pygame.Vector2(1, 0)
+
+    def fire(self, gun):
+        return inputs.get_mouse_pressed()[0]
+
+
+class BotController:
+    '''
+    Бот для прогонов без окна: отступает от ближайших врагов по кругу и стреляет в ближайшего.
+    skill от 0 до 1 - насколько точно бот целится и как рано начинает отступать.
+    '''
+
+    def __init__(self, game, skill=1.0, fire_distance=700):
+        self.game = game
+        self.skill = skill
+        self.random = rng.get('bot')
+        self.flee_distance = 150 + 200 * skill
+        self.aim_error = 25 * (1 - skill)
+        self.fire_distance = fire_distance
+        self.strafe = 1
+        self.last_pos = None
+        self.target = None
+
+    def nearest_enemy(self, pos):
+        return min(self.game.enemy_sprites, key=lambda enemy: pos.distance_squared_to(enemy.rect.center), default=None)
+
+    def movement(self, player):
+        pos = pygame.Vector2(player.hitbox_rect.center)
+        away = pygame.Vector2()
+        for enemy in self.game.enemy_sprites:
+            offset = pos - enemy.rect.center
+            distance = offset.length()
+            if 0 < distance < self.flee_distance:
+                away += offset / distance * (1 - distance / self.flee_distance)
+
+        if not away:
+            self.last_pos = None
+            return away
+
+        # упёрся в стену - меняем сторону обхода
+        if self.last_pos is not None and pos.distance_squared_to(self.last_pos) < 0.25:
+            self.strafe = -self.strafe
+        self.last_pos = pos
+        away = away.normalize()
+        return away + away.rotate(90 * self.strafe) * 0.5
+
+    def aim(self, gun):
+        pos = pygame.Vector2(gun.player.rect.center)
+        enemy = self.nearest_enemy(pos)
+        self.target = None
+        if enemy is None or pos == enemy.rect.center:
+            return gun.player_direction
+
+        offset = pygame.Vector2(enemy.rect.center) - pos
+        if offset.length() <= self.fire_distance:
+            self.target = enemy
+        return offset.normalize().rotate(self.random.uniform(-self.aim_error, self.aim_error))
+
+    def fire(self, gun):
+        return self.target is not None
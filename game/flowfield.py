@@ -0,0 +1,123 @@
+from settings import *
+from heapq import heappush, heappop
+import numpy as np
+
+
+class FlowField:
+    '''
+    Поле направлений к игроку с разрешением в один тайл.
+    Пересчитывается Дейкстрой по сетке препятствий только когда игрок переходит в другую клетку,
+    враги берут из своей клетки следующую точку маршрута (центр лучшей соседней клетки) за O(1).
+    '''
+
+    def __init__(self, cols, rows, collision_sprites, clearance=(0, 0), cell_size=TILE_SIZE):
+        self.cols, self.rows = cols, rows
+        self.cell_size = cell_size
+        self.blocked = np.zeros((cols, rows), dtype=bool)
+        self.mark_obstacles(collision_sprites, clearance)
+        self.build_graph()
+        self.cell_centers = np.stack(np.meshgrid(np.arange(cols), np.arange(rows), indexing='ij'), axis=2) + 0.5
+
+        self.cost = np.full((cols, rows), np.inf)
+        self.waypoints = np.zeros((cols, rows, 2))
+        self.has_flow = np.zeros((cols, rows), dtype=bool)
+        self.target_cell = None
+
+    def mark_obstacles(self, collision_sprites, clearance):
+        '''
+        клетка непроходима, если враг с центром в центре клетки задел бы препятствие,
+        clearance - половина размера хитбокса врага
+        '''
+        half = self.cell_size / 2
+        for sprite in collision_sprites:
+            rect = sprite.rect.inflate(clearance[0] * 2, clearance[1] * 2)
+            left = max(int((rect.left - half) // self.cell_size) + 1, 0)
+            top = max(int((rect.top - half) // self.cell_size) + 1, 0)
+            right = min(int((rect.right - half) // self.cell_size), self.cols - 1)
+            bottom = min(int((rect.bottom - half) // self.cell_size), self.rows - 1)
+            self.blocked[left:right + 1, top:bottom + 1] = True
+
+    def build_graph(self):
+        '''соседи каждой свободной клетки, диагонали без срезания углов'''
+        diagonal = 2 ** 0.5
+        self.neighbours = [[] for _ in range(self.cols * self.rows)]
+        for x in range(self.cols):
+            for y in range(self.rows):
+                if self.blocked[x, y]:
+                    continue
+                edges = self.neighbours[x * self.rows + y]
+                for dx in (-1, 0, 1):
+                    for dy in (-1, 0, 1):
+                        nx, ny = x + dx, y + dy
+                        if (dx, dy) == (0, 0) or not (0 <= nx < self.cols and 0 <= ny < self.rows):
+                            continue
+                        if self.blocked[nx, ny]:
+                            continue
+                        if dx and dy:
+                            if self.blocked[x + dx, y] or self.blocked[x, y + dy]:
+                                continue
+                            edges.append((nx * self.rows + ny, diagonal))
+                        else:
+                            edges.append((nx * self.rows + ny, 1.0))
+
+    def cell(self, pos):
+        x = min(max(int(pos[0] // self.cell_size), 0), self.cols - 1)
+        y = min(max(int(pos[1] // self.cell_size), 0), self.rows - 1)
+        return x, y
+
+    def update(self, target):
+        cell = self.cell(target)
+        if cell == self.target_cell:
+            return False
+        self.target_cell = cell
+        self.compute(cell)
+        return True
+
+    def compute(self, target_cell):
+        # Дейкстра от клетки игрока
+        start = target_cell[0] * self.rows + target_cell[1]
+        cost = [float('inf')] * (self.cols * self.rows)
+        cost[start] = 0.0
+        heap = [(0.0, start)]
+        neighbours = self.neighbours
+        while heap:
+            current_cost, index = heappop(heap)
+            if current_cost > cost[index]:
+                continue
+            for next_index, step in neighbours[index]:
+                new_cost = current_cost + step
+                if new_cost < cost[next_index]:
+                    cost[next_index] = new_cost
+                    heappush(heap, (new_cost, next_index))
+        self.cost = np.array(cost).reshape(self.cols, self.rows)
+
+        # следующая точка - центр соседа с наименьшей стоимостью
+        padded = np.pad(self.cost, 1, constant_values=np.inf)
+        best = self.cost.copy()
+        offsets = np.zeros((self.cols, self.rows, 2))
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                if (dx, dy) == (0, 0):
+                    continue
+                neighbour = padded[1 + dx:1 + dx + self.cols, 1 + dy:1 + dy + self.rows].copy()
+                if dx and dy:
+                    # диагональ только если оба ортогональных соседа свободны
+                    side_x = padded[1 + dx:1 + dx + self.cols, 1:1 + self.rows]
+                    side_y = padded[1:1 + self.cols, 1 + dy:1 + dy + self.rows]
+                    neighbour[np.isinf(side_x) | np.isinf(side_y)] = np.inf
+                better = neighbour < best
+                best[better] = neighbour[better]
+                offsets[better] = (dx, dy)
+        self.has_flow = offsets.any(axis=2)
+        self.waypoints = (self.cell_centers + offsets) * self.cell_size
+
+    def sample(self, positions):
+        '''единичные направления для массива позиций (N, 2); нулевой вектор - клетка игрока или недостижимая клетка'''
+        cells_x = np.clip((positions[:, 0] // self.cell_size).astype(int), 0, self.cols - 1)
+        cells_y = np.clip((positions[:, 1] // self.cell_size).astype(int), 0, self.rows - 1)
+        direction = self.waypoints[cells_x, cells_y] - positions
+        length = np.hypot(direction[:, 0], direction[:, 1])
+        valid = self.has_flow[cells_x, cells_y] & (length > 0)
+        np.divide(direction, length[:, None], out=direction, where=valid[:, None])
+        direction[~valid] = 0
+        return direction
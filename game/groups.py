@@ -1,6 +1,5 @@
 from settings import *
-from support import Timer
-import random
+from support import Timer, rng
 
 class AllSprites(pygame.sprite.Group):
     def __init__(self):
@@ -24,8 +23,9 @@ class AllSprites(pygame.sprite.Group):
 
         # shake 
         if self.shake_strength > 0:
-            self.shake_offset.x = random.uniform(-self.shake_strength, self.shake_strength)
-            self.shake_offset.y = random.uniform(-self.shake_strength, self.shake_strength)
+            camera_random = rng.get('camera')
+            self.shake_offset.x = camera_random.uniform(-self.shake_strength, self.shake_strength)
+            self.shake_offset.y = camera_random.uniform(-self.shake_strength, self.shake_strength)
             # decay shake
             self.shake_strength *= 0.9
             if self.shake_strength < 0.1:
@@ -0,0 +1,86 @@
+'''
+Прогон волн без окна и звука: фиксированный dt, без отрисовки, так быстро, как позволяет процессор.
+Игроком управляет BotController, итог каждой волны печатается строкой JSON.
+Запуск из корня проекта: python game/headless.py --waves 3 --skill 0.8 --seed 1
+'''
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import argparse
+import json
+import sys
+import time
+
+from settings import *
+from support import rng
+from config import config
+from main import Game
+from memtrack import memtrack
+from controllers import BotController
+
+
+def play(game, waves=1, start_wave=1, dt=1 / FRAMERATE, skill=1.0, seed=None, time_limit=600, on_summary=None):
+    '''
+    играет волны подряд начиная со start_wave, пропуская магазин, пока бот жив и волна укладывается в time_limit секунд;
+    game можно переиспользовать между прогонами. Возвращает список итогов по волнам
+    '''
+    rng.seed(seed)
+    waves = min(waves, len(config.waves) - start_wave + 1)
+    if hasattr(game, 'player'):
+        game.reset_game()
+    game.controller = BotController(game, skill)
+    game.change_state('gameplay', False)
+    stats = game.game_stats
+    stats.wave = start_wave
+    summaries = stats.wave_summaries
+    reported = 0
+
+    while len(summaries) < waves:
+        game.update(dt)
+
+        if not game.player.player_alive:
+            summaries.append(stats.wave_summary(cleared=False))
+        elif stats.wave_active and game.sim_clock.get_ticks() - stats.wave_start_time > time_limit * 1000:
+            summaries.append(stats.wave_summary(cleared=False))
+
+        if on_summary:
+            for summary in summaries[reported:]:
+                on_summary(summary)
+        reported = len(summaries)
+        if summaries and not summaries[-1]['cleared']:
+            break
+
+        if game.current_state.state_name == 'shop':
+            game.states['shop'].next_wave()
+    return summaries
+
+
+def run(waves=1, start_wave=1, dt=1 / FRAMERATE, skill=1.0, seed=None, time_limit=600, on_summary=None, track_memory=False):
+    return play(Game(headless=True, track_memory=track_memory), waves, start_wave, dt, skill, seed, time_limit, on_summary)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='headless-прогон волн из settings/waves.json')
+    parser.add_argument('--waves', type=int, default=1)
+    parser.add_argument('--start-wave', type=int, default=1)
+    parser.add_argument('--dt', type=float, default=1 / FRAMERATE, help='шаг симуляции в секундах')
+    parser.add_argument('--skill', type=float, default=1.0, help='точность бота от 0 до 1')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--time-limit', type=float, default=600, help='максимум секунд симуляции на волну')
+    parser.add_argument('--out', help='сохранить итоги в JSON-файл')
+    parser.add_argument('--memtrack', action='store_true', help='отчёты о памяти и растущих классах на границах волн, см. memtrack.py')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    summaries = run(args.waves, args.start_wave, args.dt, args.skill, args.seed, args.time_limit, on_summary=lambda summary: print(json.dumps(summary), flush=True), track_memory=args.memtrack)
+    memtrack.stop()
+    print(f'{len(summaries)} waves in {time.perf_counter() - start:.1f} s', file=sys.stderr)
+
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(summaries, f, ensure_ascii=False, indent=4)
+
+
+if __name__ == '__main__':
+    main()
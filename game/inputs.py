@@ -0,0 +1,117 @@
+from settings import *
+import struct
+
+# клавиши, которые читает игра; в логе каждая - один бит
+TRACKED_KEYS = (
+    pygame.K_w, pygame.K_a, pygame.K_s, pygame.K_d,
+    pygame.K_ESCAPE, pygame.K_1, pygame.K_2, pygame.K_3, pygame.K_4,
+    pygame.K_i, pygame.K_q, pygame.K_k, pygame.K_l, pygame.K_t,
+    pygame.K_F5, pygame.K_F6, pygame.K_F7, pygame.K_F8,
+    pygame.K_F3, pygame.K_F4
+)
+KEY_BITS = {key: 1 << index for index, key in enumerate(TRACKED_KEYS)}
+
+# заголовок: метка, версия, сид прогона; кадр: dt, зажатые и только что нажатые клавиши, мышь, кнопки мыши
+HEADER = struct.Struct('<4sHq')
+FRAME = struct.Struct('<dIIhhB')
+MAGIC = b'BFRP'
+VERSION = 1
+
+
+def key_bits(keys):
+    return sum(bit for key, bit in KEY_BITS.items() if keys[key])
+
+
+def button_bits(held, pressed):
+    return sum(1 << index for index in range(3) if held[index]) | sum(8 << index for index in range(3) if pressed[index])
+
+
+class KeyState:
+    '''индексируется как pygame.key.get_pressed(): keys[pygame.K_w]'''
+    __slots__ = ('bits',)
+
+    def __init__(self, bits=0):
+        self.bits = bits
+
+    def __getitem__(self, key):
+        return bool(self.bits & KEY_BITS.get(key, 0))
+
+
+class Input:
+    '''
+    Ввод игры за кадр. Вся игра читает клавиатуру и мышь только отсюда:
+    poll() снимает состояние с pygame (и пишет его в лог при записи) или берёт следующий кадр из реплея.
+    '''
+
+    def __init__(self):
+        self.keys = KeyState()
+        self.just_pressed = KeyState()
+        self.mouse_pos = (0, 0)
+        self.buttons = 0
+        self.record_file = None
+        self.replay_frames = None
+
+    # ===== pygame-like =====
+    def get_pressed(self):
+        return self.keys
+
+    def get_just_pressed(self):
+        return self.just_pressed
+
+    def get_pos(self):
+        return self.mouse_pos
+
+    def get_mouse_pressed(self):
+        return tuple(bool(self.buttons & (1 << index)) for index in range(3))
+
+    def get_mouse_just_pressed(self):
+        return tuple(bool(self.buttons & (8 << index)) for index in range(3))
+
+    # ===== frame =====
+    def poll(self, dt):
+        '''обновляет состояние на новый кадр, возвращает dt кадра - в реплее записанный'''
+        if self.replay_frames is not None:
+            frame = next(self.replay_frames, None)
+            if frame is None:
+                self.replay_frames = None
+                return None
+            dt, keys, just_pressed, x, y, self.buttons = frame
+            self.keys.bits, self.just_pressed.bits, self.mouse_pos = keys, just_pressed, (x, y)
+            return dt
+
+        self.keys.bits = key_bits(pygame.key.get_pressed())
+        self.just_pressed.bits = key_bits(pygame.key.get_just_pressed())
+        self.mouse_pos = pygame.mouse.get_pos()
+        self.buttons = button_bits(pygame.mouse.get_pressed(), pygame.mouse.get_just_pressed())
+        if self.record_file:
+            self.record_file.write(FRAME.pack(dt, self.keys.bits, self.just_pressed.bits, *self.mouse_pos, self.buttons))
+        return dt
+
+    # ===== record / replay =====
+    def start_recording(self, path, seed):
+        self.record_file = open(path, 'wb')
+        self.record_file.write(HEADER.pack(MAGIC, VERSION, seed))
+
+    def start_replay(self, path):
+        '''загружает лог, возвращает сид, с которым он был записан'''
+        with open(path, 'rb') as f:
+            data = f.read()
+        magic, version, seed = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'{path}: не лог ввода Blitzframe v{VERSION}')
+        # недописанный последний кадр (игра упала во время записи) отбрасываем
+        end = len(data) - (len(data) - HEADER.size) % FRAME.size
+        self.replay_frames = FRAME.iter_unpack(data[HEADER.size:end])
+        return seed
+
+    @property
+    def replaying(self):
+        return self.replay_frames is not None
+
+    def stop(self):
+        if self.record_file:
+            self.record_file.close()
+            self.record_file = None
+        self.replay_frames = None
+
+inputs = Input()
@@ -0,0 +1,58 @@
+from time import perf_counter
+
+
+class Loader:
+    '''
+    Загрузка по кусочкам между кадрами, пока играет интро.
+    Задача - генератор, каждый yield - место, где загрузку можно прервать до следующего кадра.
+    update() выполняет шаги задач по очереди, пока не кончится бюджет кадра,
+    steps у задачи - примерное число yield, по нему считается progress.
+    '''
+
+    def __init__(self, budget=0.008):
+        self.budget = budget
+        self.tasks = []  # [имя, генератор, оставшиеся шаги по оценке]
+        self.finished = set()
+        self.total_steps = 0
+        self.done_steps = 0
+
+    def add(self, name, task, steps=1):
+        self.tasks.append([name, task, steps])
+        self.total_steps += steps
+
+    @property
+    def done(self):
+        return not self.tasks
+
+    def ready(self, name):
+        return name in self.finished
+
+    @property
+    def progress(self):
+        '''от 0 до 1'''
+        return self.done_steps / self.total_steps if self.total_steps else 1.0
+
+    def step(self):
+        task = self.tasks[0]
+        try:
+            next(task[1])
+            if task[2] > 1:
+                task[2] -= 1
+                self.done_steps += 1
+        except StopIteration:
+            self.tasks.pop(0)
+            self.done_steps += task[2]
+            self.finished.add(task[0])
+
+    def update(self):
+        '''шаги загрузки, пока не кончится бюджет кадра; хотя бы один шаг за кадр'''
+        start = perf_counter()
+        while self.tasks:
+            self.step()
+            if perf_counter() - start >= self.budget:
+                break
+
+    def finish(self):
+        '''догрузить всё сразу - в headless или когда ресурсы нужны прямо сейчас'''
+        while self.tasks:
+            self.step()
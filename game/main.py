@@ -1,4 +1,7 @@
 from settings import *
+import argparse
+import os
+from time import perf_counter
 
 import states.gameplay
 import states.menu
@@ -8,11 +11,36 @@ from groups import AllSprites
 from support import *
 from sprites import *
 from sound import Sound
+from audio import audio
+from pool import Pool
+from swarm import EnemySwarm
+from flowfield import FlowField
+from controllers import KeyboardController
+from inputs import inputs
+from config import config
+from loader import Loader
+from perf import perf, PerfOverlay
+from profiler import profiler
+from memtrack import memtrack
 
 class Game:
-    def __init__(self):
+    def __init__(self, headless=False, seed=None, record=None, replay=None, hot_reload=False, profile=None, track_memory=False):
         # game init
+        # headless - без отрисовки, переходов и музыки, см. headless.py
+        self.headless = headless
         pygame.init()
+        
+        # seed / input log
+        if replay:
+            seed = inputs.start_replay(replay)
+        rng.seed(seed)
+        if record:
+            inputs.start_recording(record, rng.base_seed)
+        self.replay_frame_times = []
+        
+        # settings
+        config.load()
+        config.watch = hot_reload
         self.display_surface = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT), pygame.NOFRAME)
         pygame.display.set_caption('Blitzframe')
         self.clock = pygame.time.Clock()
@@ -20,28 +48,86 @@ class Game:
         create_score_json()
         
         self.intro = states.menu.Intro(join('images', 'intro.png'), duration=5.5)
+        self.intro.done = headless
+        self.controller = KeyboardController()
         
-        self.reset_game()  # инициализация состояния игры
-        
-        # menu background
-        screen_size = pygame.display.get_surface().get_size()
-        self.background = states.menu.Background('images/menu_background.png', scale=2, screen_size=screen_size)
-
+        self.sim_clock = sim_clock
+        self.transition = Transition(self.display_surface.get_size())
         
         # sounds
         self.sounds_volume = 0.1
         self.music_volume = 0.1
-        self.sound = Sound(self)
         
-
-    def reset_game(self):
+        # до первого кадра готовы только окно и картинка интро, остальное грузится под интро,
+        # меню появляется, как только загружено всё для него
+        self.states = {}
+        self.current_state = None
+        self.loader = Loader()
+        self.loader.add('menu', self.load_menu(), steps=5)
+        self.loader.add('assets', self.load_assets(), steps=6)
+        self.loader.add('world', self.build_world(), steps=6)
+        self.perf_overlay = None
         
+        # profile - сколько кадров профилировать с запуска (0 - до выхода), F4 пишет столько же кадров с момента нажатия
+        self.profile_frames = profile or 600
+        if profile is not None:
+            profiler.start(profile)
+        # отчёты о памяти и утечках на границах волн
+        if track_memory:
+            memtrack.start()
+        if headless:
+            self.loader.finish()
+            self.enter_menu()
         
+
+    # громкость хранится в шинах audio, слайдеры настроек пишут сюда каждый кадр
+    @property
+    def sounds_volume(self):
+        return audio.buses['sfx'].volume
+
+    @sounds_volume.setter
+    def sounds_volume(self, value):
+        audio.buses['sfx'].volume = value
+
+    @property
+    def music_volume(self):
+        return audio.buses['music'].volume
+
+    @music_volume.setter
+    def music_volume(self, value):
+        audio.buses['music'].volume = value
+
+    @property
+    def game_paused(self):
+        return self.sim_clock.paused
+
+    @game_paused.setter
+    def game_paused(self, value):
+        self.sim_clock.paused = value
+
+    def reset_game(self):
         # Сбросить все игровые объекты и состояния
+        self.rebuild_world()
+        self.enter_menu()
+
+    def rebuild_world(self):
+        '''новый мир целиком, без входа в меню - для on_swap перехода, который сам включит меню'''
+        for _ in self.build_world():
+            pass
+
+    def enter_menu(self):
+        self.buttons_sprites.empty()
+        self.current_state = self.states['main_menu']
+        self.current_state.on_enter()
+
+    def build_world(self):
+        '''карта, пулы, поле потоков и игровые состояния; генератор, чтобы строиться по шагам под интро'''
         self.game_paused = False
+        self.sim_clock.time_scale = 1
+        self.sim_clock.reset()
+        scheduler.clear()
         self.all_sprites = AllSprites()
         self.collision_sprites = pygame.sprite.Group()
-        self.buttons_sprites = pygame.sprite.Group()
         self.enemy_sprites = pygame.sprite.Group()
         self.bullet_sprites = pygame.sprite.Group()
         self.enemies_bullet_sprites = pygame.sprite.Group()
@@ -51,25 +137,40 @@ class Game:
         self.available_weapons = {
             'pistol': Pistol
         }
+        
+        # pools
+        self.bullet_pool = Pool(Bullet, capacity=256, name='bullets')
+        self.enemy_bullet_pool = Pool(Bullet, capacity=512, name='enemy_bullets')
+        self.enemy_pools = {name: Pool(cls, capacity=128) for name, cls in ENEMIES.items()}
+        
+        yield
+        
         # tilemap
         self.tilemap = Tilemap(self.all_sprites, self.collision_sprites)
+        yield
         self.tilemap.setup()
+        yield
         
-        # load assets
-        self.load_assets()
+        # enemies movement
+        # поле строится по самому большому хитбоксу обычных врагов
+        hitboxes = [frames['0'].get_rect().inflate(-20, -40) for name, frames in self.enemies_frames_dict.items() if not ENEMIES[name].boss]
+        clearance = (max(rect.width for rect in hitboxes) / 2, max(rect.height for rect in hitboxes) / 2)
+        self.flow_field = FlowField(self.tilemap.map.width, self.tilemap.map.height, self.collision_sprites, clearance)
+        yield
+        self.enemy_swarm = EnemySwarm(self.collision_sprites, self.flow_field)
+        yield
         
-        # game states
-        self.states = {
-            'main_menu': states.menu.Menu(self),
-            'settings': states.menu.Settings(self),
+        # game states, меню и настройки создаются один раз в load_menu
+        self.states.update({
             'gameplay': states.gameplay.Gameplay(self),
             'pause': states.gameplay.Pause(self),
             'shop': states.gameplay.Shop(self),
             'game_over': states.gameplay.GameOver(self)
-        }
-        
-        self.current_state = self.states['main_menu']
-        self.current_state.on_enter() 
+        })
+
+    def pools(self):
+        '''все пулы мира - для F3 и итогов волн'''
+        return [self.bullet_pool, self.enemy_bullet_pool, *self.enemy_pools.values()]
 
     def change_gun(self, gun, sound=True):
         if gun in self.available_weapons:
@@ -79,23 +180,53 @@ class Game:
                 self.play_sound('gun_swap')
 
     def play_sound(self, name):
-        self.sound.sounds[name].play()
+        audio.play(name)
 
-    def change_state(self, new_state: str, animation=True):
+    def change_state(self, new_state: str, animation=True, on_swap=None):
+        '''on_swap - тяжёлая работа (rebuild_world), которая выполняется, пока экран закрыт затемнением'''
         def state_func():
+            # ушли из меню раньше, чем догрузился мир - догружаем, пока экран чёрный
+            self.loader.finish()
+            if on_swap:
+                on_swap()
             self.buttons_sprites.empty()
             self.current_state = self.states[new_state]
             self.current_state.on_enter()    
-        if animation:
-            transition_effect(
-                    surface=self.display_surface,
-                    callback=state_func,
-                    draw_callback=lambda: self.current_state.draw())
+        if animation and not self.headless:
+            self.transition.start(state_func)
         else:
             state_func()
         
 
+    def load_menu(self):
+        '''всё, что нужно главному меню и настройкам'''
+        self.buttons_sprites = pygame.sprite.Group()
+        
+        # ===== fonts =====
+        self.m_font = pygame.font.Font(join('fonts', 'PixCyrillic.ttf'), 40)
+        self.l_font = pygame.font.Font(join('fonts', 'PixCyrillic.ttf'), 80)
+        self.s_font = pygame.font.Font(join('fonts', 'PixCyrillic.ttf'), 30)
+        self.xs_font = pygame.font.Font(join('fonts', 'PixCyrillic.ttf'), 24)
+        yield
+        
+        # ===== buttons =====
+        self.buttons_frames = folder_importer(join('images', 'buttons'))
+        yield
+        
+        # menu background
+        screen_size = pygame.display.get_surface().get_size()
+        self.background = states.menu.Background('images/menu_background.png', scale=2, screen_size=screen_size)
+        yield
+        
+        # sounds
+        self.sound = Sound(self)
+        yield
+        
+        self.states['main_menu'] = states.menu.Menu(self)
+        self.states['settings'] = states.menu.Settings(self)
+
     def load_assets(self):
+        '''кадры игрока, врагов и пуль - один раз за запуск, reset_game их не перезагружает'''
         # graphics 
         def scale_frame(surf, scale=3):
             return pygame.transform.scale(
@@ -125,24 +256,30 @@ class Game:
 
             return player_frames
         self.player_frames = load_and_scale_player_frames()
+        self.player_death_frame = scale_frame(pygame.image.load(join('images', 'player', 'death.png')).convert_alpha())
+        yield
 
         # ===== normal ========
         enemy_frames = folder_importer('images', 'enemies', 'normal')
         self.normal_enemy_frames = {
             name: scale_frame(surf, 1.5)
             for name, surf in enemy_frames.items()}
+        yield
         
         # ====== fast ==============
         self.fast_enemy_frames = folder_importer('images', 'enemies', 'fast')
+        yield
         
         # ====== heavy ==============
         self.heavy_enemy_frames = folder_importer('images', 'enemies', 'heavy')
+        yield
         
         # ====== first_boss =========
         first_boss_frames = folder_importer('images', 'enemies', 'first_boss')
         self.first_boss_frames = {
             name: scale_frame(surf, 1)
             for name, surf in first_boss_frames.items()}
+        yield
         
         self.enemies_frames_dict = {
             'normal': self.normal_enemy_frames,
@@ -151,43 +288,142 @@ class Game:
             'first_boss': self.first_boss_frames
         }
         
-        # ===== buttons =====
-        self.buttons_frames = folder_importer(join('images', 'buttons'))
-        
-        # ===== fonts =====
-        self.m_font = pygame.font.Font(join('fonts', 'PixCyrillic.ttf'), 40)
-        self.l_font = pygame.font.Font(join('fonts', 'PixCyrillic.ttf'), 80)
-        self.s_font = pygame.font.Font(join('fonts', 'PixCyrillic.ttf'), 30)
-        self.xs_font = pygame.font.Font(join('fonts', 'PixCyrillic.ttf'), 24)
+        # ===== bullets =====
+        # одна поверхность на всю игру: frame_cache держит маску по самому Surface
+        self.bullet_surf = pygame.image.load(join('images', 'guns', 'bullet.png')).convert_alpha()
+        self.enemy_bullet_surf = pygame.image.load(join('images', 'guns', 'enemy_bullet.png')).convert_alpha()
 
         
+    def update(self, dt):
+        # новые настройки подменяются только между кадрами
+        config.poll(dt)
+        if inputs.get_just_pressed()[pygame.K_F3]:
+            perf.toggle()
+        if inputs.get_just_pressed()[pygame.K_F4]:
+            profiler.toggle(self.profile_frames)
+        if not self.loader.done:
+            self.loader.update()
+            
+        if self.current_state is None:
+            # меню появляется, как только закончилось интро и готово всё для меню
+            if self.intro.done and self.loader.ready('menu'):
+                self.enter_menu()
+        elif self.transition:
+            # во время перехода состояние стоит, идут только сам переход и звук
+            self.transition.update(dt)
+        elif self.intro.done:
+            # симуляция идёт шагами по своим часам, на паузе шагов нет
+            if self.loader.done:
+                for step in self.sim_clock.steps(dt):
+                    scheduler.advance(self.sim_clock.get_ticks())
+                    with perf.probe('update'):
+                        self.all_sprites.update(step)
+                    if hasattr(self.current_state, 'step'):
+                        self.current_state.step(step)
+                    if self.transition:
+                        # шаг запустил переход - дальше состояние стоит до его конца
+                        break
+            self.current_state.update(dt)
+        if not self.headless and self.current_state is not None:
+            self.sound.update(dt)
+        self.intro.update(dt)
+        memtrack.frame()
+
+    def draw(self):
+        self.display_surface.fill('black')
+        if self.current_state is None:
+            if self.intro.done:
+                self.draw_loading()
+        elif self.intro.done and not self.transition.covered:
+            self.current_state.draw()
+        self.transition.draw(self.display_surface)
+        self.intro.draw()
+        if perf.enabled and self.loader.ready('menu'):
+            self.draw_perf()
+        with perf.probe('display'):
+            pygame.display.update()
+
+    def draw_perf(self):
+        if self.perf_overlay is None:
+            self.perf_overlay = PerfOverlay(perf, self.xs_font)
+        gauges = {}
+        if self.loader.done:
+            gauges = {
+                'sprites': len(self.all_sprites),
+                'enemies': len(self.enemy_sprites),
+                'bullets': len(self.bullet_sprites) + len(self.enemies_bullet_sprites),
+                'timers': len(scheduler)
+            }
+            # пул: занято/максимум, промахи (создание нового объекта), доля переиспользованных
+            for pool in self.pools():
+                if pool.acquired:
+                    gauges[f'pool {pool.name}'] = f'{pool.live}/{pool.high_water} miss {pool.misses} {pool.reuse_rate:.0%}'
+        self.perf_overlay.draw(self.display_surface, self.clock.get_time() / 1000, self.clock.get_fps(), gauges)
+
+    def draw_loading(self):
+        '''полоска загрузки, если интро кончилось раньше, чем загрузилось меню'''
+        rect = pygame.FRect(0, 0, 400, 16)
+        rect.center = (WINDOW_WIDTH / 2, WINDOW_HEIGHT / 2)
+        pygame.draw.rect(self.display_surface, (60, 60, 60), rect, border_radius=4)
+        rect.width *= self.loader.progress
+        pygame.draw.rect(self.display_surface, (220, 220, 220), rect, border_radius=4)
+
     def run(self):
         while self.running:
             dt = self.clock.tick(FRAMERATE) / 1000
+            frame_start = perf_counter()
+            profiler.tick(self.profile_label())
             
             # event loop
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    self.running = False
-                    
-            # update
-            if self.intro.done:
-                if not self.game_paused:
-                    self.all_sprites.update(dt)
-                self.current_state.update(dt)
-            self.sound.update(dt)
-            self.intro.update(dt)
+            with perf.probe('events'):
+                for event in pygame.event.get():
+                    if event.type == pygame.QUIT:
+                        self.running = False
             
-            # draw
-            self.display_surface.fill('black')
-            if self.intro.done:
-                self.current_state.draw()
-            self.intro.draw()
+            # в реплее dt и ввод берутся из лога
+            replaying = inputs.replaying
+            dt = inputs.poll(dt)
+            if dt is None:
+                break
             
-            pygame.display.update()
+            start = perf_counter()
+            self.update(dt)
+            self.draw()
+            if replaying:
+                self.replay_frame_times.append(perf_counter() - start)
+            perf.end_frame(perf_counter() - frame_start)
+        
+        inputs.stop()
+        profiler.stop()
+        memtrack.stop()
+        if self.replay_frame_times:
+            self.print_replay_stats()
         pygame.quit()
+
+    def profile_label(self):
+        '''метка кадра для профайлера: состояние и волна, пока идёт игра'''
+        state = type(self.current_state).__name__ if self.current_state is not None else 'Loading'
+        if hasattr(self, 'player'):
+            return f'{state};wave {self.game_stats.wave}'
+        return state
+
+    def print_replay_stats(self):
+        '''время кадра (update + draw) за реплей - для сравнения до и после изменений'''
+        times = sorted(self.replay_frame_times)
+        mean = sum(times) / len(times)
+        p95 = times[int(len(times) * 0.95)]
+        print(f'replay: {len(times)} frames, mean {mean * 1000:.2f} ms, p95 {p95 * 1000:.2f} ms, max {times[-1] * 1000:.2f} ms')
         
 
 if __name__ == '__main__':
-    game = Game()
+    parser = argparse.ArgumentParser(description='Blitzframe')
+    parser.add_argument('--seed', type=int, help='сид случайности для прогона')
+    parser.add_argument('--record', help='записать ввод в файл')
+    parser.add_argument('--replay', help='воспроизвести записанный ввод')
+    parser.add_argument('--hot-reload', action='store_true', help='перечитывать settings/*.json при изменении')
+    parser.add_argument('--profile', type=int, metavar='FRAMES', default=os.environ.get('BLITZ_PROFILE'), help='профилировать первые FRAMES кадров, 0 - до выхода (или BLITZ_PROFILE=FRAMES)')
+    parser.add_argument('--memtrack', action='store_true', default=os.environ.get('BLITZ_MEMTRACK', '0') != '0', help='отчёты о памяти на границах волн (или BLITZ_MEMTRACK=1)')
+    args = parser.parse_args()
+    
+    game = Game(seed=args.seed, record=args.record, replay=args.replay, hot_reload=args.hot_reload, profile=args.profile, track_memory=args.memtrack)
     game.run()
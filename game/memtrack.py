@@ -0,0 +1,162 @@
+from settings import *
+import gc
+import json
+import os
+import sys
+import tracemalloc
+from datetime import datetime
+from support import Timer, TimerHandle
+from profiler import PROFILES_DIR
+
+# классы, живые объекты которых считаются на границах волн; спрайты - по каждому подклассу
+WATCHED = (pygame.sprite.Sprite, Timer, TimerHandle, pygame.Surface, pygame.mask.Mask, pygame.font.Font)
+# эти типы gc не отслеживает, их ищем среди ссылок отслеживаемых объектов
+UNTRACKED = (pygame.Surface, pygame.mask.Mask, pygame.font.Font)
+GAME_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def count_live(watched=WATCHED, untracked=UNTRACKED):
+    '''число живых объектов по имени класса'''
+    counts = {}
+    seen = set()
+    for obj in gc.get_objects():
+        if isinstance(obj, watched):
+            name = type(obj).__name__
+            counts[name] = counts.get(name, 0) + 1
+        for referent in gc.get_referents(obj):
+            if isinstance(referent, untracked) and id(referent) not in seen:
+                seen.add(id(referent))
+                name = type(referent).__name__
+                counts[name] = counts.get(name, 0) + 1
+    return counts
+
+
+def game_site(traceback):
+    '''ближайшая к выделению строка кода игры, а не numpy или pygame'''
+    for frame in reversed(traceback):
+        if frame.filename.startswith(GAME_DIR):
+            return f'{os.path.relpath(frame.filename, GAME_DIR)}:{frame.lineno}'
+    return f'{os.path.basename(traceback[-1].filename)}:{traceback[-1].lineno}'
+
+
+class MemoryTracker:
+    '''
+    Память по кадрам и поиск утечек за долгую сессию: BLITZ_MEMTRACK=1 или --memtrack.
+    Отсчёт идёт с начала первой волны (wave_start), загрузка и меню в отчёты не попадают.
+    frame() раз в кадр снимает у tracemalloc пик и текущий объём - сколько кадр выделил временно и сколько оставил.
+    wave_end() на границе волны пишет строку отчёта в profiles/memory-<время>.jsonl:
+    память за кадры волны, места в коде, где память выросла с прошлой границы (в том числе на кадр),
+    и число живых спрайтов, таймеров и Surface по классам. Класс, число объектов которого росло
+    growth_waves границ подряд, попадает в growing - кандидат в утечки.
+    '''
+
+    def __init__(self, depth=4, top=10, growth_waves=3, out_dir=PROFILES_DIR):
+        self.depth = depth
+        self.top = top
+        self.growth_waves = growth_waves
+        self.out_dir = out_dir
+        self.enabled = False
+        self.snapshot = None  # снимок на последней границе, None - отсчёт ещё не начат
+
+    def start(self):
+        if self.enabled:
+            return
+        self.enabled = True
+        tracemalloc.start(self.depth)
+        self.path = join(self.out_dir, f'memory-{datetime.now():%Y%m%d-%H%M%S}.jsonl')
+        self.history = {}  # класс -> число объектов на каждой границе
+        self.snapshot = None
+
+    def stop(self):
+        if self.enabled:
+            self.enabled = False
+            self.snapshot = None
+            tracemalloc.stop()
+
+    def boundary(self):
+        '''начало нового отрезка: снимок для сравнения и обнулённые счётчики кадров'''
+        gc.collect()
+        self.snapshot = self.take_snapshot()
+        self.frames = 0
+        self.transient = []
+        self.net = 0
+        self.last = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+
+    def take_snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__)
+        ))
+
+    # ===== per frame =====
+    def frame(self):
+        if self.snapshot is None:
+            return
+        current, peak = tracemalloc.get_traced_memory()
+        self.transient.append(peak - self.last)
+        self.net += current - self.last
+        self.frames += 1
+        self.last = current
+        tracemalloc.reset_peak()
+
+    # ===== wave boundary =====
+    def wave_start(self):
+        '''первая граница - начало первой волны'''
+        if self.enabled and self.snapshot is None:
+            self.boundary()
+            self.record(count_live())
+
+    def wave_end(self, wave):
+        if self.snapshot is None:
+            return
+        frames = max(self.frames, 1)
+        transient = self.transient or [0]
+        growth = {}  # место в коде игры -> [байт, блоков]
+        for stat in self.take_snapshot().compare_to(self.snapshot, 'traceback'):
+            site = growth.setdefault(game_site(stat.traceback), [0, 0])
+            site[0] += stat.size_diff
+            site[1] += stat.count_diff
+        sites = [
+            {'site': site, 'kb': round(size / 1024, 1), 'blocks': count, 'bytes_per_frame': round(size / frames)}
+            for site, (size, count) in sorted(growth.items(), key=lambda item: -item[1][0])[:self.top]
+            if size > 0
+        ]
+        report = {
+            'wave': wave,
+            'frames': self.frames,
+            'alloc_kb_per_frame': round(sum(transient) / frames / 1024, 2),
+            'alloc_kb_max': round(max(transient) / 1024, 2),
+            'net_kb_per_frame': round(self.net / frames / 1024, 3),
+            'traced_kb': round(tracemalloc.get_traced_memory()[0] / 1024),
+            'growth_sites': sites
+        }
+        self.boundary()
+        self.record(count_live(), report)
+
+    def record(self, counts, report=None):
+        for name in counts.keys() | self.history.keys():
+            self.history.setdefault(name, []).append(counts.get(name, 0))
+        if report is None:
+            return
+
+        report['objects'] = dict(sorted(counts.items()))
+        report['growing'] = self.growing()
+        os.makedirs(self.out_dir, exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(report, ensure_ascii=False) + '\n')
+
+        print(f'memtrack: wave {report["wave"]}  {report["alloc_kb_per_frame"]} kB/frame  net {report["net_kb_per_frame"]} kB/frame  traced {report["traced_kb"]} kB', file=sys.stderr)
+        for name in report['growing']:
+            print(f'memtrack:   {name} растёт {self.growth_waves} волны подряд: {self.history[name][-self.growth_waves - 1:]}', file=sys.stderr)
+
+    def growing(self):
+        '''классы, число объектов которых строго росло на последних growth_waves границах'''
+        flagged = []
+        for name, counts in self.history.items():
+            recent = counts[-self.growth_waves - 1:]
+            if len(recent) > self.growth_waves and all(a < b for a, b in zip(recent, recent[1:])):
+                flagged.append(name)
+        return sorted(flagged)
+
+memtrack = MemoryTracker()
@@ -0,0 +1,78 @@
+from settings import *
+from dataclasses import dataclass
+from math import gcd, radians, cos, sin
+
+PATTERN_TYPES = ('ring', 'spiral', 'fan', 'aimed')
+
+
+def unit_vectors(angles):
+    return tuple(pygame.Vector2(cos(radians(angle)), sin(radians(angle))) for angle in angles)
+
+
+@dataclass(frozen=True)
+class BulletPattern:
+    '''
+    Один залп босса, направления посчитаны при загрузке:
+    ring и spiral - готовые таблицы векторов (у spiral по таблице на каждый поворот),
+    fan и aimed - cos/sin поворотов относительно направления на игрока.
+    '''
+    name: str
+    kind: str
+    speed: float
+    lifetime: int
+    tables: tuple = ()
+    rotations: tuple = ()
+
+    def directions(self, phase, aim):
+        '''phase - номер залпа этого паттерна, aim - единичный вектор на игрока'''
+        if self.tables:
+            return self.tables[phase % len(self.tables)]
+        ax, ay = aim
+        return [pygame.Vector2(ax * c - ay * s, ax * s + ay * c) for c, s in self.rotations]
+
+
+@dataclass(frozen=True)
+class BossPatterns:
+    name: str
+    attack_interval: int
+    volleys: int
+    volley_delay: int
+    sound: str
+    patterns: tuple
+
+
+def build_pattern(name, data):
+    kind = data['type']
+    count = data.get('count', 1)
+    if kind not in PATTERN_TYPES:
+        raise ValueError(f'паттерн "{name}": неизвестный тип "{kind}", нужен один из {PATTERN_TYPES}')
+    if not isinstance(count, int) or count < 1:
+        raise ValueError(f'паттерн "{name}": count должен быть целым >= 1')
+
+    if kind in ('ring', 'spiral'):
+        ring = [data.get('offset', 0) + 360 / count * i for i in range(count)]
+        if kind == 'ring':
+            return BulletPattern(name, kind, data['speed'], data['lifetime'], tables=(unit_vectors(ring),))
+        # спираль поворачивается на step за залп - таблицы на весь оборот
+        step = data['step']
+        if not isinstance(step, int) or step % 360 == 0:
+            raise ValueError(f'паттерн "{name}": step спирали - целое число градусов, не кратное 360')
+        phases = 360 // gcd(step, 360)
+        tables = tuple(unit_vectors(angle + step * phase for angle in ring) for phase in range(phases))
+        return BulletPattern(name, kind, data['speed'], data['lifetime'], tables=tables)
+
+    spread = data.get('spread', 0) if kind == 'fan' else 0
+    angles = [-spread / 2 + spread * i / (count - 1) for i in range(count)] if count > 1 else [0]
+    rotations = tuple((cos(radians(angle)), sin(radians(angle))) for angle in angles)
+    return BulletPattern(name, kind, data['speed'], data['lifetime'], rotations=rotations)
+
+
+def build_boss_patterns(name, data):
+    return BossPatterns(
+        name,
+        data['attack_interval'],
+        data['volleys'],
+        data['volley_delay'],
+        data.get('sound', 'laser_shot'),
+        tuple(build_pattern(pattern_name, pattern) for pattern_name, pattern in data['patterns'].items())
+    )
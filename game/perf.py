@@ -0,0 +1,174 @@
+from settings import *
+from collections import deque
+from time import perf_counter
+
+# разделы кадра в порядке Game.run; всё, что не попало в разделы, показывается как other
+SECTIONS = ('events', 'update', 'collision', 'draw', 'ui', 'display')
+COLORS = {
+    'events': (120, 120, 255),
+    'update': (90, 200, 90),
+    'collision': (230, 200, 60),
+    'draw': (230, 120, 50),
+    'ui': (200, 80, 200),
+    'display': (80, 200, 220),
+    'other': (150, 150, 150)
+}
+
+
+class NullProbe:
+    '''замер при выключенном оверлее - один общий объект, который ничего не делает'''
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+NULL_PROBE = NullProbe()
+
+
+class Probe:
+    '''замер одного раздела; объект на раздел создаётся один раз и переиспользуется каждый кадр'''
+    __slots__ = ('stats', 'name', 'start')
+
+    def __init__(self, stats, name):
+        self.stats = stats
+        self.name = name
+        self.start = 0
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        self.stats.add(self.name, perf_counter() - self.start)
+        return False
+
+
+class FrameStats:
+    '''
+    Время кадра по разделам и счётчики за кадр для оверлея (F3).
+    Пока enabled=False, probe() возвращает NULL_PROBE, а count() и end_frame() сразу выходят,
+    так что замеры можно оставлять в коде насовсем.
+    '''
+
+    def __init__(self, window=240):
+        self.enabled = False
+        self.frames = deque(maxlen=window)
+        self.history = {name: deque(maxlen=window) for name in SECTIONS}
+        self.current = dict.fromkeys(SECTIONS, 0.0)
+        self.probes = {name: Probe(self, name) for name in SECTIONS}
+        self.counters = {}
+        self.last_counters = {}
+
+    def toggle(self):
+        '''включение и выключение посреди кадра не должно переносить недосчитанный кадр в следующий замер'''
+        self.enabled = not self.enabled
+        self.frames.clear()
+        for history in self.history.values():
+            history.clear()
+        self.current = dict.fromkeys(SECTIONS, 0.0)
+        self.counters = {}
+        self.last_counters = {}
+
+    # ===== probes =====
+    def probe(self, name):
+        if not self.enabled:
+            return NULL_PROBE
+        return self.probes[name]
+
+    def add(self, name, seconds):
+        self.current[name] += seconds
+
+    def count(self, name, value=1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def end_frame(self, seconds):
+        if not self.enabled:
+            return
+        self.frames.append(seconds)
+        for name in SECTIONS:
+            self.history[name].append(self.current[name])
+            self.current[name] = 0.0
+        self.last_counters = self.counters
+        self.counters = {}
+
+    # ===== stats =====
+    def percentile(self, q):
+        if not self.frames:
+            return 0.0
+        frames = sorted(self.frames)
+        return frames[min(int(q * len(frames)), len(frames) - 1)]
+
+    def section_means(self):
+        '''средние по окну, мс; other - остаток кадра вне разделов'''
+        count = len(self.frames)
+        if not count:
+            return {}
+        means = {name: sum(self.history[name]) / count * 1000 for name in SECTIONS}
+        means['other'] = max(sum(self.frames) / count * 1000 - sum(means.values()), 0)
+        return means
+
+
+class PerfOverlay:
+    '''
+    Панель в углу экрана: FPS, p50/p95/p99, график времени кадра, разделы и счётчики.
+    Текст перерисовывается 4 раза в секунду, график - каждый кадр.
+    '''
+
+    def __init__(self, stats, font, size=(560, 440), budget=1 / FRAMERATE):
+        self.stats = stats
+        self.font = font
+        self.surface = pygame.Surface(size, pygame.SRCALPHA)
+        self.rect = self.surface.get_rect(topright=(WINDOW_WIDTH - 10, 10))
+        self.budget = budget
+        self.lines = []
+        self.since_text = 1
+
+    def update_text(self, fps, gauges):
+        stats = self.stats
+        lines = [(f'FPS {fps:5.1f}   p50 {stats.percentile(0.5) * 1000:5.2f}   p95 {stats.percentile(0.95) * 1000:5.2f}   p99 {stats.percentile(0.99) * 1000:5.2f} ms', 'white')]
+        for name, ms in stats.section_means().items():
+            lines.append((f'{name:<10} {ms:6.2f} ms', COLORS[name]))
+        # счётчики в строку, пока она помещается в панель
+        line = ''
+        for name, value in {**gauges, **stats.last_counters}.items():
+            text = f'{line}   {name} {value}' if line else f'{name} {value}'
+            if line and self.font.size(text)[0] > self.rect.width - 16:
+                lines.append((line, 'white'))
+                text = f'{name} {value}'
+            line = text
+        if line:
+            lines.append((line, 'white'))
+        self.lines = [self.font.render(text, False, color) for text, color in lines]
+
+    def draw_graph(self, rect):
+        '''столбик на кадр, высота - время кадра, красная линия - бюджет 1/FRAMERATE'''
+        pygame.draw.rect(self.surface, (20, 20, 20, 200), rect)
+        frames = self.stats.frames
+        scale = rect.height / (self.budget * 2)
+        width = rect.width / frames.maxlen
+        for index, seconds in enumerate(frames):
+            height = min(seconds * scale, rect.height)
+            color = (90, 200, 90) if seconds <= self.budget else (230, 80, 60)
+            pygame.draw.line(self.surface, color, (rect.left + index * width, rect.bottom), (rect.left + index * width, rect.bottom - height))
+        y = rect.bottom - self.budget * scale
+        pygame.draw.line(self.surface, (230, 60, 60), (rect.left, y), (rect.right, y))
+
+    def draw(self, surface, dt, fps, gauges):
+        self.since_text += dt
+        if self.since_text >= 0.25:
+            self.since_text = 0
+            self.update_text(fps, gauges)
+
+        self.surface.fill((0, 0, 0, 170))
+        y = 6
+        for text in self.lines:
+            self.surface.blit(text, (8, y))
+            y += text.get_height() + 2
+        self.draw_graph(pygame.Rect(8, y + 4, self.rect.width - 16, max(self.rect.height - y - 12, 20)))
+        surface.blit(self.surface, self.rect)
+
+perf = FrameStats()
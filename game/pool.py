@@ -0,0 +1,79 @@
+class Pool:
+    '''
+    Пул переиспользуемых объектов.
+    acquire() достаёт свободный экземпляр (через reset) или создаёт новый,
+    release() возвращает экземпляр обратно. Объекты сверх capacity не хранятся.
+    '''
+
+    def __init__(self, cls, capacity=None, name=None):
+        self.cls = cls
+        self.capacity = capacity
+        self.name = name or cls.__name__
+        self.free = []
+
+        # stats
+        self.live = 0
+        self.high_water = 0
+        self.acquired = 0
+        self.reused = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.free)
+
+    def create(self, *args, **kwargs):
+        obj = self.cls(*args, **kwargs)
+        obj.pool = self
+        self.live += 1
+        return obj
+
+    def acquire(self, *args, **kwargs):
+        self.acquired += 1
+        if self.free:
+            obj = self.free.pop()
+            obj.reset(*args, **kwargs)
+            self.reused += 1
+            self.live += 1
+        else:
+            obj = self.create(*args, **kwargs)
+            self.misses += 1
+        if self.live > self.high_water:
+            self.high_water = self.live
+        return obj
+
+    def release(self, obj):
+        self.live -= 1
+        if self.capacity is None or len(self.free) < self.capacity:
+            self.free.append(obj)
+
+    def prewarm(self, count, *args, **kwargs):
+        '''заранее создаёт объекты, чтобы в пуле было хотя бы count свободных'''
+        if self.capacity is not None:
+            count = min(count, self.capacity)
+        while len(self.free) < count:
+            self.create(*args, **kwargs).kill()
+
+    @property
+    def reuse_rate(self):
+        return self.reused / self.acquired if self.acquired else 0.0
+
+    def stats(self):
+        return {
+            'name': self.name,
+            'live': self.live,
+            'free': len(self.free),
+            'high_water': self.high_water,
+            'misses': self.misses,
+            'reuse_rate': round(self.reuse_rate, 3)
+        }
+
+
+class PooledSprite:
+    '''примесь для спрайтов из пула: kill() возвращает спрайт в пул'''
+    pool = None
+
+    def kill(self):
+        alive = self.alive()
+        super().kill()
+        if alive and self.pool is not None:
+            self.pool.release(self)
@@ -0,0 +1,139 @@
+from settings import *
+import cProfile
+import os
+import pstats
+import sys
+import threading
+from datetime import datetime
+
+PROFILES_DIR = 'profiles'
+
+
+class Profiler:
+    '''
+    Профилирование окна из frames кадров: F4 или переменная окружения BLITZ_PROFILE=<кадров>.
+    Каждый кадр помечается состоянием и волной (tick), поэтому и сэмплы, и cProfile делятся по меткам.
+    Сэмплер - отдельный поток, который каждые interval секунд снимает стек главного потока;
+    стеки пишутся в .collapsed (flamegraph.pl, speedscope, inferno), cProfile - в .pstats на каждую метку и общий.
+    mode: 'sample', 'cprofile' или 'both' - cProfile замедляет вызовы Python и немного сдвигает сэмплы.
+    frames=0 - до stop() или выхода из игры.
+    '''
+
+    def __init__(self, interval=0.002, mode='both', out_dir=PROFILES_DIR):
+        self.interval = interval
+        self.mode = mode
+        self.out_dir = out_dir
+        self.active = False
+        self.frames_left = None  # None - без ограничения
+        self.label = 'Loading'
+        self.samples = {}  # (метка, стек) -> число сэмплов
+        self.names = {}  # code -> имя кадра в стеке
+        self.profiles = {}  # метка -> cProfile.Profile
+        self.current = None
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.main_thread = threading.main_thread().ident
+
+    def start(self, frames=600):
+        if self.active:
+            return
+        self.active = True
+        self.frames_left = frames or None
+        self.samples = {}
+        self.profiles = {}
+        self.current = None
+        self.started = datetime.now()
+        if self.mode in ('sample', 'both'):
+            self.stop_event.clear()
+            self.thread = threading.Thread(target=self.sample_loop, name='profiler', daemon=True)
+            self.thread.start()
+        print(f'profiler: запись {frames or "всех"} кадров')
+
+    def toggle(self, frames=600):
+        if self.active:
+            self.stop()
+        else:
+            self.start(frames)
+
+    def tick(self, label):
+        '''вызывается в начале каждого кадра; label - "Состояние;wave N"'''
+        if not self.active:
+            return
+        if self.frames_left == 0:
+            # все frames кадров уже записаны, этот кадр в окно не входит
+            self.stop()
+            return
+        if self.frames_left:
+            self.frames_left -= 1
+        self.label = label
+        if self.mode in ('cprofile', 'both'):
+            profile = self.profiles.get(label)
+            if profile is None:
+                profile = self.profiles[label] = cProfile.Profile()
+            if profile is not self.current:
+                if self.current is not None:
+                    self.current.disable()
+                profile.enable()
+                self.current = profile
+
+    def stop(self):
+        if not self.active:
+            return
+        self.active = False
+        if self.current is not None:
+            self.current.disable()
+            self.current = None
+        if self.thread is not None:
+            self.stop_event.set()
+            self.thread.join()
+            self.thread = None
+        self.write()
+
+    # ===== sampling =====
+    def sample_loop(self):
+        while not self.stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.main_thread)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                name = self.names.get(code)
+                if name is None:
+                    name = self.names[code] = f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+                stack.append(name)
+                frame = frame.f_back
+            key = (self.label, tuple(reversed(stack)))
+            self.samples[key] = self.samples.get(key, 0) + 1
+
+    # ===== output =====
+    def write(self):
+        os.makedirs(self.out_dir, exist_ok=True)
+        name = join(self.out_dir, f'profile-{self.started:%Y%m%d-%H%M%S}')
+        written = []
+
+        if self.samples:
+            with open(f'{name}.collapsed', 'w', encoding='utf-8') as f:
+                for (label, stack), count in self.samples.items():
+                    f.write(f'{label};{";".join(stack)} {count}\n')
+            written.append(f'{name}.collapsed')
+
+        if self.profiles:
+            for label, profile in self.profiles.items():
+                path = f'{name}-{label.replace(";", "-").replace(" ", "").lower()}.pstats'
+                profile.dump_stats(path)
+                written.append(path)
+            pstats.Stats(*self.profiles.values()).dump_stats(f'{name}.pstats')
+            written.append(f'{name}.pstats')
+
+        print('profiler: ' + ', '.join(written))
+        for label, count in sorted(self.label_counts().items(), key=lambda item: -item[1]):
+            print(f'  {label:<24} {count} samples')
+
+    def label_counts(self):
+        counts = {}
+        for (label, _), count in self.samples.items():
+            counts[label] = counts.get(label, 0) + count
+        return counts
+
+profiler = Profiler()
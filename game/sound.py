@@ -1,5 +1,5 @@
 from settings import *
-from support import audio_importer
+from audio import audio, PRELOAD
 from states.menu import Menu, Settings
 from states.gameplay import Gameplay, Pause, Shop
 
@@ -11,39 +11,30 @@ class Sound:
         # states
         self.prev_state = None
         self.state = Menu.music_state
-        
-        self.current_music = None
     
     def load_sounds(self):
-        self.music: dict[str, pygame.mixer.Sound] = audio_importer(join('sounds', 'music'))
-        self.sounds: dict[str, pygame.mixer.Sound] = audio_importer(join('sounds', 'sounds'))
-        self.step_sounds: dict[str, pygame.mixer.Sound] = audio_importer(join('sounds', 'sounds', 'steps'))
+        '''звуки регистрируются один раз в audio, здесь только имена'''
+        audio.init()
+        audio.music.scan(join('sounds', 'music'))
+        self.sounds: list[str] = audio.load_folder(join('sounds', 'sounds'), 'sfx')
+        self.step_sounds: list[str] = audio.load_folder(join('sounds', 'sounds', 'steps'), 'footsteps')
+        audio.preload(PRELOAD)
+        audio.preload(self.step_sounds)
         
     def play_music(self):
+        '''переход между треками и отсутствующие треки обрабатывает audio.music'''
         if self.state != self.prev_state:
-            if self.current_music:
-                self.current_music.fadeout(1000)
             if self.state == Menu.music_state:
-                self.current_music = self.music['menu']
-                self.current_music.play(loops=-1)
+                audio.music.play('menu')
             if self.state == Gameplay.music_state:
-                self.current_music = self.music['gameplay']
-                self.current_music.play(loops=-1)
+                audio.music.play('gameplay')
             if self.state == Shop.music_state:
-                self.current_music = self.music['shop']
-                self.current_music.play(loops=-1)
+                audio.music.play('shop')
         
         
     def update(self, dt):
+        '''громкость выставляют шины audio при изменении, здесь только смена музыки'''
         self.play_music()
+        audio.music.update(dt)
         self.prev_state = self.state
-        self.state = self.game.current_state.music_state
-        
-        for music in self.music.values():
-            music.set_volume(self.game.music_volume*1.5)
-            
-        for sound in self.sounds.values():
-            sound.set_volume(self.game.sounds_volume*1.5)
-            
-        for sound in self.step_sounds.values():
-            sound.set_volume(self.game.sounds_volume*1.5 * 5)
\ No newline at end of file
+        self.state = self.game.current_state.music_state
\ No newline at end of file
@@ -0,0 +1,62 @@
+from heapq import heappush, heappop, nsmallest
+
+
+class SpawnScheduler:
+    '''
+    Очередь спавна волны - куча по времени появления.
+    За один шаг создаётся не больше budget врагов, остальные сдвигаются на следующие шаги,
+    а в шаги без спавнов пулы заранее достраиваются под ближайшие lookahead спавнов.
+    '''
+
+    def __init__(self, pools, spawn, prepare, budget=4, lookahead=8, prepare_per_step=2):
+        self.pools = pools
+        self.spawn = spawn  # spawn(name) - достать врага из пула и поставить на карту
+        self.prepare = prepare  # prepare(name, count) - довести число свободных в пуле до count
+        self.budget = budget
+        self.lookahead = lookahead
+        self.prepare_per_step = prepare_per_step
+        self.queue = []
+        self.order = 0
+
+        # stats
+        self.deferred = 0
+        self.prepared = 0
+
+    def __len__(self):
+        return len(self.queue)
+
+    def push(self, due, name):
+        self.order += 1
+        heappush(self.queue, (due, self.order, name))
+
+    def clear(self):
+        self.queue = []
+
+    def update(self, now):
+        spawned = 0
+        while self.queue and self.queue[0][0] <= now:
+            if spawned == self.budget:
+                self.deferred += 1
+                break
+            self.spawn(heappop(self.queue)[2])
+            spawned += 1
+
+        if not spawned:
+            self.prepare_ahead()
+        return spawned
+
+    def prepare_ahead(self):
+        '''
+        создаём не больше prepare_per_step врагов за шаг - по счёту, а не по времени,
+        чтобы прогон с тем же сидом оставался воспроизводимым
+        '''
+        needed = {}
+        for _, _, name in nsmallest(self.lookahead, self.queue):
+            needed[name] = needed.get(name, 0) + 1
+
+        budget = self.prepare_per_step
+        for name, count in needed.items():
+            while budget and len(self.pools[name]) < count:
+                self.prepare(name, len(self.pools[name]) + 1)
+                self.prepared += 1
+                budget -= 1
@@ -1,5 +1,9 @@
 from settings import *
 from support import *
+from pool import PooledSprite
+from inputs import inputs
+from config import config
+from audio import audio
 from math import degrees, atan2, radians, cos, sin
 
 class Sprite(pygame.sprite.Sprite):
@@ -13,6 +17,7 @@ class AnimatedSprite(Sprite):
     def __init__(self, groups, pos, frames):
         self.frames, self.frame_index, self.animation_speed = frames, 0, 5
         super().__init__(groups, pos, self.frames[str(self.frame_index)])
+        self.mask = frame_cache.mask(self.image)
         
     def animate(self, dt):
         self.frame_index += self.animation_speed * dt
@@ -20,9 +25,11 @@ class AnimatedSprite(Sprite):
         self.original_image = frame
         
         if hasattr(self, "direction") and self.direction.x > 0:
-                self.image = pygame.transform.flip(self.original_image, True, False)
-        else:
-            self.image = self.original_image
+            frame = frame_cache.flipped(frame)
+        # маска меняется только вместе с кадром, отражённые кадры и их маски берутся из кэша
+        if frame is not self.image:
+            self.image = frame
+            self.mask = frame_cache.mask(frame)
         
 # =============== player =====================
 
@@ -32,20 +39,23 @@ class Player(Sprite):
         self.game = game
         self.all_sprites = groups
         self.frames = frames
-        self.death_frame = pygame.image.load(join('images', 'player', 'death.png')).convert_alpha()
-        self.death_frame = pygame.transform.scale(self.death_frame, (self.death_frame.get_width() * 3, self.death_frame.get_height() * 3))
+        self.death_frame = game.player_death_frame
         self.state = 'down'
         self.frame_index = 1
         self.last_state = 'down'
         super().__init__(groups, pos, self.frames[self.state][self.frame_index])
         self.rect = self.image.get_frect(center=pos)
         self.hitbox_rect = self.rect.inflate(-30, -50)
+        self.mask = frame_cache.mask(self.image)
 
         # movement
         self.direction = pygame.Vector2()
         self.speed = 150
         self.knockback = True
-        self.knockback_freeze_timer = None
+        def knockback_on():
+            self.knockback = True
+        self.knockback_freeze_timer = Timer(100, False, False, knockback_on)
+        self.knockback_timer = Timer(100)
 
         # health
         self.health = self.max_health = 100
@@ -54,26 +64,27 @@ class Player(Sprite):
 
         # colisions
         self.collision_sprites = collision_sprites
+        # препятствия карты статичны - rect собираются один раз для collidelistall
+        self.obstacle_rects = [sprite.rect for sprite in collision_sprites]
 
         # sounds 
         self.step_cooldown = False
-        self.step_sounds = list(self.game.sound.step_sounds.values())
+        self.step_sounds = self.game.sound.step_sounds
         def step_reset():
             self.step_cooldown = False
         self.step_timer = Timer(400, False, False, step_reset)
 
     def input(self):
-        keys = pygame.key.get_pressed()
-        self.direction.x = int(keys[pygame.K_d]) - int(keys[pygame.K_a])
-        self.direction.y = int(keys[pygame.K_s]) - int(keys[pygame.K_w])
+        self.direction = self.game.controller.movement(self)
         if self.direction.length_squared() > 0:
             self.direction = self.direction.normalize()
         
         if not self.step_cooldown and self.direction:
-            random.choice(self.step_sounds).play()
+            audio.play(rng.get('sound').choice(self.step_sounds))
             self.step_cooldown = True
             self.step_timer.activate()
         # ===== test ==============
+        keys = inputs.get_pressed()
         if keys[pygame.K_k]:
             self.health -= 3
         if keys[pygame.K_l]:
@@ -92,9 +103,8 @@ class Player(Sprite):
         for sprite in self.collision_sprites:
             if sprite.rect.colliderect(self.hitbox_rect):
                 self.knockback = False
-                def knockback_on():
-                    self.knockback = True
-                self.knockback_freeze_timer = Timer(100, False, True, knockback_on)
+                self.knockback_freeze_timer.duration = 100
+                self.knockback_freeze_timer.activate()
                 if direction == 'horizontal':
                     if self.direction.x > 0: self.hitbox_rect.right = sprite.rect.left
                     if self.direction.x < 0: self.hitbox_rect.left = sprite.rect.right
@@ -138,48 +148,70 @@ class Player(Sprite):
         frame_list = self.frames[state]
         frame = frame_list[int(self.frame_index) % len(frame_list)]
 
-        # Для левых направлений используем кадры из 'left', 'left_up', 'left_down', если они есть
-        if state in ['left', 'left_up', 'left_down']:
-            self.image = frame
-        else:
+        if frame is not self.image:
             self.image = frame
+            self.mask = frame_cache.mask(frame)
 
         self.state = state
 
-    def solid_move(self, dx, dy):
-        '''плавное движение, чтобы сквозь объекты не кидало'''
-        self.hitbox_rect.x += dx
-        for sprite in self.collision_sprites:
-            if sprite.rect.colliderect(self.hitbox_rect):
-                if dx > 0:
-                    self.hitbox_rect.right = sprite.rect.left
-                if dx < 0:
-                    self.hitbox_rect.left = sprite.rect.right
-
-        self.hitbox_rect.y += dy
-        for sprite in self.collision_sprites:
-            if sprite.rect.colliderect(self.hitbox_rect):
-                if dy > 0:
-                    self.hitbox_rect.bottom = sprite.rect.top
-                if dy < 0:
-                    self.hitbox_rect.top = sprite.rect.bottom
-
-        self.rect.center = self.hitbox_rect.center
+    def swept_move(self, dx, dy):
+        '''
+        движение за один шаг без прохода сквозь стены при любой длине шага:
+        по каждой оси rect всего пути проверяется против препятствий, и шаг обрезается по ближайшему.
+        Если хитбокс уже залез в препятствие (угол стены), сначала выталкиваем его наружу
+        '''
+        hitbox = self.hitbox_rect
+        self.push_out()
+        if dx:
+            for i in hitbox.union(hitbox.move(dx, 0)).collidelistall(self.obstacle_rects):
+                rect = self.obstacle_rects[i]
+                if dx > 0 and rect.left >= hitbox.right:
+                    dx = min(dx, rect.left - hitbox.right)
+                elif dx < 0 and rect.right <= hitbox.left:
+                    dx = max(dx, rect.right - hitbox.left)
+            hitbox.x += dx
+
+        if dy:
+            for i in hitbox.union(hitbox.move(0, dy)).collidelistall(self.obstacle_rects):
+                rect = self.obstacle_rects[i]
+                if dy > 0 and rect.top >= hitbox.bottom:
+                    dy = min(dy, rect.top - hitbox.bottom)
+                elif dy < 0 and rect.bottom <= hitbox.top:
+                    dy = max(dy, rect.bottom - hitbox.top)
+            hitbox.y += dy
+
+        self.rect.center = hitbox.center
+
+    def push_out(self):
+        '''выталкивает хитбокс из препятствий, которые он уже пересекает, по оси с наименьшим перекрытием'''
+        hitbox = self.hitbox_rect
+        for i in hitbox.collidelistall(self.obstacle_rects):
+            rect = self.obstacle_rects[i]
+            if not rect.colliderect(hitbox):
+                continue  # уже вытолкнуты предыдущим препятствием
+            left, right = rect.right - hitbox.left, hitbox.right - rect.left
+            up, down = rect.bottom - hitbox.top, hitbox.bottom - rect.top
+            if min(left, right) <= min(up, down):
+                hitbox.x += left if left < right else -right
+            else:
+                hitbox.y += up if up < down else -down
 
     def death(self):
         self.player_alive = False
         self.image = self.death_frame
+        self.mask = frame_cache.mask(self.image)
 
     def take_damage(self, enemy=None, damage=None):
         '''передаётся либо enemy либо damage, damage - когда пуля прилетает, enemy - когда дамажит соприкосновением'''
         if not self.damage_delay_timer:
-            if hasattr(self, 'knockback_timer') and self.knockback_timer and self.knockback_timer.active:
+            if self.knockback_timer:
                 return  
             
             if enemy:
                 damage = enemy.damage
             
             self.health -= int(damage)
+            self.game.game_stats.damage_taken += int(damage)
             self.damage_delay_timer.activate()
             
             
@@ -203,30 +235,19 @@ class Player(Sprite):
                     if direction.length_squared() > 0:
                         self.knockback_direction = direction.normalize()
                         self.knockback_speed = 400 
-                        self.knockback_timer = Timer(100)
                         self.knockback_timer.activate()
                     else:
                         self.knockback_direction = pygame.Vector2()
-                        self.knockback_timer = None
+                        self.knockback_timer.cancel()
                 self.knockback = False
-                def knockback_on():
-                    self.knockback = True
-                self.knockback_freeze_timer = Timer(500, False, True, knockback_on)
+                self.knockback_freeze_timer.duration = 500
+                self.knockback_freeze_timer.activate()
 
 
     def apply_knockback(self, dt):
-        if hasattr(self, 'knockback_timer') and self.knockback_timer and self.knockback_timer.active:
-            full_move = self.knockback_direction * self.knockback_speed * dt
-
-            steps = int(full_move.length() // 2) + 1
-            step = full_move / steps if steps > 0 else pygame.Vector2()
-
-            for _ in range(steps):
-                self.solid_move(step.x, step.y)
-
-            self.knockback_timer.update()
-        elif hasattr(self, 'knockback_timer') and self.knockback_timer:
-            self.knockback_timer.deactivate()
+        if self.knockback_timer:
+            move = self.knockback_direction * self.knockback_speed * dt
+            self.swept_move(move.x, move.y)
 
                 
 
@@ -234,49 +255,80 @@ class Player(Sprite):
         if self.player_alive:
             self.input()
             self.move(dt)
-            self.damage_delay_timer.update()
-            
             self.apply_knockback(dt)
             self.animate(dt)
-            
-            self.step_timer.update()
-            if self.knockback_freeze_timer: self.knockback_freeze_timer.update()
 
 # =============== enemies ====================
         
-class Enemy(AnimatedSprite):
+class Enemy(PooledSprite, AnimatedSprite):
     boss = False
+    slot = None
     def __init__(self, groups, pos, frames, player: Player, collision_sprites, health_multiplier=1, speed_multiplier=1, damage_multiplier=1, game=None):
         super().__init__(groups, pos, frames)
+
+        # timers
+        def reset_speed():
+            self.speed = self.base_speed
+            self.damage = self.base_damage
+        self.death_timer = Timer(200, func=self.kill)
+        self.deal_damage_timer = Timer(1000, func=reset_speed)
+
+        self.setup(player, collision_sprites, health_multiplier, speed_multiplier, damage_multiplier)
+
+    def reset(self, groups, pos, frames, player: Player, collision_sprites, health_multiplier=1, speed_multiplier=1, damage_multiplier=1, game=None):
+        '''повторная инициализация врага, взятого из пула'''
+        self.add(groups)
+        self.frames, self.frame_index, self.animation_speed = frames, 0, 5
+        self.image = self.frames[str(self.frame_index)]
+        self.mask = frame_cache.mask(self.image)
+        self.rect = self.image.get_frect(topleft=pos)
+        self.setup(player, collision_sprites, health_multiplier, speed_multiplier, damage_multiplier)
+
+    def setup(self, player, collision_sprites, health_multiplier, speed_multiplier, damage_multiplier):
         self.health_multiplier = health_multiplier
         self.speed_multiplier = speed_multiplier
         self.damage_multiplier = damage_multiplier
-        
-        self.death_timer = Timer(200, func=self.kill)
+
         self.player = player
         self.collision_active = True
-        
-        info = self.get_info(self.name)
-        speed, health, damage = info['speed'], info['health'], info['damage']
-        
-        self.base_speed = self.speed = random.randint(speed-10, speed+10) * speed_multiplier
+        self.swarm = player.game.enemy_swarm
+
+        info = config.enemy(self.name)
+        speed, health, damage = info.speed, info.health, info.damage
+
+        self.base_speed = self.speed = rng.get('enemies').randint(speed-10, speed+10) * speed_multiplier
         self.max_health = self.health = health * health_multiplier
         self.base_damage = self.damage = damage * damage_multiplier
-        
+
         # timers
-        def reset_speed():
-            self.speed = self.base_speed
-            self.damage = self.base_damage
-        self.deal_damage_timer = Timer(1000, func=reset_speed)
-        self.bump_timer = Timer(0)
-        self.bump_dir_locked = False
+        self.death_timer.cancel()
+        self.deal_damage_timer.cancel()
 
-    
         # rect
         self.hitbox_rect = self.rect.inflate(-20, -40)
         self.collision_sprites = collision_sprites
         self.direction = pygame.Vector2()
-    
+        self.slot = self.swarm.add(self)
+
+    @property
+    def speed(self):
+        return self._speed
+
+    @speed.setter
+    def speed(self, value):
+        '''скорость дублируется в массив EnemySwarm'''
+        self._speed = value
+        if self.slot is not None:
+            self.swarm.speed[self.slot] = value
+
+    def kill(self):
+        self.death_timer.cancel()
+        self.deal_damage_timer.cancel()
+        if self.slot is not None:
+            self.swarm.remove(self.slot)
+            self.slot = None
+        super().kill()
+
     def deal_damage(self):
         if not self.deal_damage_timer:
             self.damage = 0
@@ -293,13 +345,15 @@ class Enemy(AnimatedSprite):
         self.collision_active = False
         self.player.game.play_sound('enemy_kill')
         self.death_timer.activate()
+        self.swarm.active[self.slot] = False
         self.animation_speed = 0
-        self.image = pygame.mask.from_surface(self.image).to_surface()
+        # силуэт строится из уже готовой маски, сама маска не меняется
+        self.image = self.mask.to_surface()
         self.image.set_colorkey('black')
     
 
-    def collision(self, direction):
-        for sprite in self.collision_sprites:
+    def collision(self, direction, obstacles):
+        for sprite in obstacles:
             if sprite.rect.colliderect(self.hitbox_rect):
                 if direction == 'horizontal':
                     if self.direction.x > 0:
@@ -312,38 +366,17 @@ class Enemy(AnimatedSprite):
                     elif self.direction.y < 0:
                         self.hitbox_rect.top = sprite.rect.bottom
 
-                # временное обходное направление
-                if not self.bump_timer:
-                    offset = pygame.Vector2(self.player.rect.center) - pygame.Vector2(self.rect.center)
-
-                    if direction == 'horizontal':
-                        self.direction = pygame.Vector2(0, -1 if offset.y < 0 else 1)
-                        obstacle_size = sprite.rect.height
-                    else:
-                        self.direction = pygame.Vector2(-1 if offset.x < 0 else 1, 0)
-                        obstacle_size = sprite.rect.width
-                        
-
-                    duration = int(obstacle_size * 11)
-                    self.bump_timer = Timer(duration)
-                    self.bump_timer.activate()
-
-    def get_info(self, name):
-        data = load_json(join('settings', 'enemy_settings.json'))
-        return data[name]
-    
-    def move(self, dt):
-        if not self.bump_timer:
-            player_pos = pygame.Vector2(self.player.rect.center) 
-            enemy_pos = pygame.Vector2(self.rect.center)
-            self.direction = (player_pos - enemy_pos).normalize()
+    def move(self, dt, obstacles=None):
+        '''поштучное движение со столкновениями, направление заранее считает EnemySwarm по FlowField'''
+        if obstacles is None:
+            obstacles = self.collision_sprites
 
         # Движение и столкновение
         self.hitbox_rect.x += self.direction.x * self.speed * dt
-        self.collision('horizontal')
+        self.collision('horizontal', obstacles)
 
         self.hitbox_rect.y += self.direction.y * self.speed * dt
-        self.collision('vertical')
+        self.collision('vertical', obstacles)
 
         self.rect.center = self.hitbox_rect.center
         
@@ -363,15 +396,7 @@ class Enemy(AnimatedSprite):
         pygame.draw.rect(surface, (220, 30, 30), (x, y, current_width, bar_height), border_radius=3)
     
     def update(self, dt):
-        self.death_timer.update()
-        
         if not self.death_timer:
-            if self.bump_timer:
-                self.bump_timer.update()
-                if not self.bump_timer:
-                    self.bump_timer = None  # сброс ссылки после деактивации
-            self.deal_damage_timer.update()
-            self.move(dt)
             self.animate(dt)
         
     
@@ -393,111 +418,50 @@ class HeavyEmemy(Enemy):
         super().__init__(groups, pos, frames, player, collision_sprites, health_multiplier,  speed_multiplier, damage_multiplier, game=None)   
 
 
-class FirstBoss(Enemy):
-    name = 'first_boss'
+class Boss(Enemy):
+    '''босс стреляет залпами из settings/boss_patterns.json по своему name'''
     boss = True
     def __init__(self, groups, pos, frames, player, collision_sprites, health_multiplier=1, speed_multiplier=1, damage_multiplier=1, game=None):
         super().__init__(groups, pos, frames, player, collision_sprites, health_multiplier, speed_multiplier, damage_multiplier, game=None)
         self.game = game
-        self.attack_timer = Timer(5000, True, True, self.attack)
-        self.bullet_surf = pygame.image.load(join('images', 'guns', 'enemy_bullet.png')).convert_alpha()
-        self.attack_timers_list = []
+        self.attack_timer = Timer(config.boss(self.name).attack_interval, True, True, self.attack)
+        self.bullet_surf = game.enemy_bullet_surf
+        self.attack_handles = []
+        self.phases = {}
+
+    def reset(self, *args, game=None, **kwargs):
+        super().reset(*args, **kwargs)
+        self.game = game
+        self.attack_timer.duration = config.boss(self.name).attack_interval
+        self.attack_timer.activate()
+        self.attack_handles = []
+        self.phases = {}
+
+    def kill(self):
+        self.attack_timer.cancel()
+        for handle in self.attack_handles:
+            scheduler.cancel(handle)
+        super().kill()
 
     def attack(self):
-        attack_list = [self.star_attack, 
-                       self.laser_attack, 
-                       self.triple_shot_attack, 
-                       self.wave_attack, 
-                       self.spiral_attack]
-        
-        self.attack_timers_list = []
-        number_of_attacks = 6
-        attacks_delay = 400
-        current_attack = random.choice(attack_list)
-        
-        for i in range(1, number_of_attacks+1):
-            self.attack_timers_list.append(Timer(attacks_delay*i, False, True, current_attack))
-     
-    def spiral_attack(self):
-        self.game.play_sound('laser_shot')
-        num_bullets = 8
-        self.spiral_angle = getattr(self, "spiral_angle", 0) + 10  
-        for i in range(num_bullets):
-            angle = radians(self.spiral_angle + (360 / num_bullets) * i)
-            direction = pygame.Vector2(cos(angle), sin(angle))
-            Bullet(
-                (self.game.all_sprites, self.game.enemies_bullet_sprites),
-                self.rect.center,
-                self.bullet_surf,
-                direction,
-                self.damage,
-                lifetime=6000,
-                speed=250*self.speed_multiplier
-            )
-      
-    def wave_attack(self):
-        self.game.play_sound('laser_shot')
-        bullets_per_ring = 12
-        for i in range(bullets_per_ring):
-            angle = radians((360 / bullets_per_ring) * i)
-            direction = pygame.Vector2(cos(angle), sin(angle))
-            Bullet(
-                (self.game.all_sprites, self.game.enemies_bullet_sprites),
-                self.rect.center,
-                self.bullet_surf,
-                direction,
-                self.damage,
-                lifetime=7000,
-                speed=190*self.speed_multiplier
-                )      
-    
-    def laser_attack(self):
-        self.game.play_sound('laser_shot')
-        direction = (pygame.Vector2(self.game.player.rect.center) - pygame.Vector2(self.rect.center)).normalize()
-        Bullet(
-            (self.game.all_sprites, self.game.enemies_bullet_sprites),
-            self.rect.center,
-            self.bullet_surf,
-            direction,
-            self.damage,
-            lifetime=3000,
-            speed=460*self.speed_multiplier
-        )
-    
-    def triple_shot_attack(self):
-        self.game.play_sound('laser_shot')
-        direction = (pygame.Vector2(self.game.player.rect.center) - pygame.Vector2(self.rect.center)).normalize()
-        angles = [-15, 0, 15]
-        for a in angles:
-            rotated = direction.rotate(a)
-            Bullet(
-                (self.game.all_sprites, self.game.enemies_bullet_sprites),
-                self.rect.center,
-                self.bullet_surf,
-                rotated,
-                self.damage,
-                lifetime=5000,
-                speed=270*self.speed_multiplier
-            )
-    
-    def star_attack(self):
-        self.game.play_sound('laser_shot')
-        bullet_directions = [
-            (0, -1), (1, -1), (1, 0), (1, 1),
-            (0, 1), (-1, 1), (-1, 0), (-1, -1)
-        ]
-
-        for d in bullet_directions:
-            direction = pygame.Vector2(*d).normalize()
-            Bullet(
-                (self.game.all_sprites, self.game.enemies_bullet_sprites),
-                self.rect.center,
-                self.bullet_surf,
-                direction,
-                self.damage,
-                lifetime=10000,
-                speed=300*self.speed_multiplier
-            )
+        patterns = config.boss(self.name)
+        pattern = rng.get('boss').choice(patterns.patterns)
+        fire = lambda: self.fire(pattern, patterns.sound)
+        self.attack_handles = [scheduler.schedule(patterns.volley_delay*i, fire) for i in range(1, patterns.volleys+1)]
+
+    def fire(self, pattern, sound):
+        '''весь залп за один вызов: направления из таблицы паттерна, общие аргументы для всех пуль'''
+        self.game.play_sound(sound)
+        phase = self.phases[pattern.name] = self.phases.get(pattern.name, 0) + 1
+        aim = pygame.Vector2(self.game.player.rect.center) - pygame.Vector2(self.rect.center)
+        aim = aim.normalize() if aim else pygame.Vector2(1, 0)
+
+        acquire = self.game.enemy_bullet_pool.acquire
+        groups = (self.game.all_sprites, self.game.enemies_bullet_sprites)
+        pos = self.rect.center
+        speed = pattern.speed * self.speed_multiplier
+        for direction in pattern.directions(phase, aim):
+            acquire(groups, pos, self.bullet_surf, direction, self.damage, lifetime=pattern.lifetime, speed=speed)
 
     def draw_health(self, surface, *args):
         bar_width = 500
@@ -519,32 +483,99 @@ class FirstBoss(Enemy):
         surface.blit(text, text_rect)
 
 
-    def update(self, dt):
-        super().update(dt)
-        self.attack_timer.update()
-        for timer in self.attack_timers_list:
-            timer.update()
+class FirstBoss(Boss):
+    name = 'first_boss'
+
+
+ENEMIES = {
+    NormalEnemy.name: NormalEnemy,
+    FastEnemy.name: FastEnemy,
+    HeavyEmemy.name: HeavyEmemy,
+    FirstBoss.name: FirstBoss
+}
+config.require_bosses(name for name, cls in ENEMIES.items() if cls.boss)
+
 
-        
 
 # ================== guns & bulet ====================
 
 
-class Bullet(Sprite):
+class Bullet(PooledSprite, Sprite):
     def __init__(self, groups, pos, surf, direction: pygame.Vector2, damage: int = 100, lifetime: int = 2000, speed: int = 600):
         super().__init__(groups, pos, surf)
+        self.mask = frame_cache.mask(surf)
+        self.lifetime_timer = Timer(lifetime, False, False, self.kill)
+        self.setup(direction, damage, lifetime, speed)
+
+    def reset(self, groups, pos, surf, direction: pygame.Vector2, damage: int = 100, lifetime: int = 2000, speed: int = 600):
+        self.add(groups)
+        self.image = surf
+        self.mask = frame_cache.mask(surf)
+        self.rect = self.image.get_frect(topleft=pos)
+        self.setup(direction, damage, lifetime, speed)
+
+    def setup(self, direction, damage, lifetime, speed):
         self.direction = direction
         self.speed = speed
-        self.lifetime_timer = Timer(lifetime, False, True, self.kill)   
         self.damage = damage
+        self.previous = self.rect.center
+        self.lifetime_timer.duration = lifetime
+        self.lifetime_timer.activate()
+
+    def kill(self):
+        self.lifetime_timer.cancel()
+        super().kill()
+
+    # ===== swept collision =====
+    def swept_rect(self):
+        '''rect, покрывающий весь путь пули за последний шаг'''
+        x, y = self.previous
+        return self.rect.union(self.rect.move(x - self.rect.centerx, y - self.rect.centery))
+
+    def hit_distance(self, target):
+        '''
+        расстояние от начала шага до попадания в target или None.
+        Сначала дешёвый тест: отрезок пути против rect цели, расширенного на размер пули, поэтому быстрая пуля
+        не пролетает врага насквозь между кадрами. Попадание подтверждает маска: пуля ставится в точки
+        отрезка внутри rect с шагом в полразмера пули, первое касание пикселей - точка попадания
+        '''
+        clip = target.rect.inflate(self.rect.size).clipline(self.previous, self.rect.center)
+        if not clip:
+            return None
+        start, end = pygame.Vector2(clip[0]), pygame.Vector2(clip[1])
+        half = pygame.Vector2(self.rect.size) / 2
+        steps = int(start.distance_to(end) / max(min(half), 1)) + 1
+        for i in range(steps + 1):
+            point = start.lerp(end, i / steps)
+            offset = (int(point.x - half.x - target.rect.x), int(point.y - half.y - target.rect.y))
+            if target.mask.overlap(self.mask, offset):
+                return point.distance_to(self.previous)
+        return None
+
+    def first_hits(self, targets):
+        '''цели, в которые пуля попала раньше всего за шаг (несколько, если задеты одновременно)'''
+        hits, nearest = [], None
+        for target in targets:
+            distance = self.hit_distance(target)
+            if distance is None:
+                continue
+            if nearest is None or distance < nearest:
+                hits, nearest = [target], distance
+            elif distance == nearest:
+                hits.append(target)
+        return hits
 
     def update(self, dt):
+        self.previous = self.rect.center
         self.rect.center += self.direction * self.speed * dt
-        self.lifetime_timer.update()    
 
-def get_info(name):
-    data = load_json(join('settings', 'gun_settings.json'))
-    return data[name]
+class GunSetting:
+    '''поле из gun_settings.json на уровне класса оружия: Pistol.price читает config.gun('pistol').price'''
+    def __init__(self, field):
+        self.field = field
+
+    def __get__(self, instance, owner):
+        return getattr(config.gun(owner.gun_name), self.field)
 
 class Gun(pygame.sprite.Sprite):
     description = 'просто оружие'
@@ -555,7 +586,7 @@ class Gun(pygame.sprite.Sprite):
         
         # surfs
         self.gun_surf = self.load_surf()
-        self.bullet_surf = pygame.image.load(join('images', 'guns', 'bullet.png')).convert_alpha()
+        self.bullet_surf = player.game.bullet_surf
         self.gun_surf = pygame.transform.smoothscale(
             self.gun_surf,
             (int(self.gun_surf.get_width() * 0.7), int(self.gun_surf.get_height() * 0.7))
@@ -569,16 +600,14 @@ class Gun(pygame.sprite.Sprite):
         self.offset = pygame.Vector2(13, 13)
         self.last_horizontal = 1
         
-        info = get_info(self.gun_name)
+        info = config.gun(self.gun_name)
         self.base_damage = self.player.game.game_stats.damage_upgrade
-        self.damage = self.base_damage * info['damage_multiplier']
-        self.cooldown = info['cooldown']
+        self.damage = self.base_damage * info.damage_multiplier
+        self.cooldown = info.cooldown
  
     
     def get_direction(self):
-        mouse_pos = pygame.Vector2(pygame.mouse.get_pos())
-        player_pos = pygame.Vector2(WINDOW_WIDTH//2, WINDOW_HEIGHT//2)
-        self.player_direction = (mouse_pos - player_pos).normalize() if mouse_pos != player_pos else pygame.Vector2(1, 0)
+        self.player_direction = self.player.game.controller.aim(self)
 
     def update_side(self):
         if self.player.direction.x > 0:
@@ -628,8 +657,7 @@ class Gun(pygame.sprite.Sprite):
         pass # rewrite
 
     def input(self):
-        mouse = pygame.mouse.get_pressed()
-        if mouse[0]:
+        if self.player.game.controller.fire(self):
             self.create_bulet()
 
     def update(self, _):
@@ -643,8 +671,8 @@ class Gun(pygame.sprite.Sprite):
 
 class Pistol(Gun):
     gun_name = 'pistol'    
-    price = get_info(gun_name)['price']
-    description = get_info(gun_name)['description']
+    price = GunSetting('price')
+    description = GunSetting('description')
     def __init__(self, groups, player):
         self.all_sprites, self.bullet_sprites = groups
         super().__init__(self.all_sprites, player)
@@ -658,18 +686,15 @@ class Pistol(Gun):
     def create_bulet(self):
         if not self.cooldown_timer:
             self.player.game.play_sound('pistol_shot')
-            Bullet((self.all_sprites, self.bullet_sprites), self.rect.center+self.player_direction*10, self.bullet_surf, self.player_direction, self.base_damage)
+            self.player.game.bullet_pool.acquire((self.all_sprites, self.bullet_sprites), self.rect.center+self.player_direction*10, self.bullet_surf, self.player_direction, self.base_damage)
             self.cooldown_timer.activate()
     
-    def update(self, dt):
-        super().update(dt)
-        self.cooldown_timer.update()
 
 
 class Shotgun(Gun):
     gun_name = 'shotgun'
-    description = get_info(gun_name)['description']
-    price = get_info(gun_name)['price']
+    description = GunSetting('description')
+    price = GunSetting('price')
     def __init__(self, groups, player):
         self.all_sprites, self.bullet_sprites = groups
         super().__init__(self.all_sprites, player)
@@ -689,52 +714,47 @@ class Shotgun(Gun):
             spread_angle = 35 
             base_angle = atan2(self.player_direction.y, self.player_direction.x)
             for _ in range(self.bullets_count):
-                random_offset = random.uniform(-spread_angle/2, spread_angle/2)
+                random_offset = rng.get('weapons').uniform(-spread_angle/2, spread_angle/2)
                 angle = base_angle + radians(random_offset)
                 direction = pygame.Vector2(cos(angle), sin(angle))
-                Bullet((self.all_sprites, self.bullet_sprites), self.rect.center+direction*10, self.bullet_surf, direction, self.damage, lifetime=380, speed=1000)
+                self.player.game.bullet_pool.acquire((self.all_sprites, self.bullet_sprites), self.rect.center+direction*10, self.bullet_surf, direction, self.damage, lifetime=380, speed=1000)
             self.cooldown_timer.activate()
     
 
-    def update(self, dt):
-        super().update(dt)
-        self.cooldown_timer.update()
-        if hasattr(self, 'reload_timer'):
-            self.reload_timer.update()
         
         
 class SniperRifle(Gun):
     gun_name = 'sniper'
-    description = get_info(gun_name)['description']
-    price = get_info(gun_name)['price']
+    description = GunSetting('description')
+    price = GunSetting('price')
     def __init__(self, groups, player):
         self.all_sprites, self.bullet_sprites = groups
         super().__init__(self.all_sprites, player)
         
         self.cooldown_timer = Timer(self.cooldown)
+        self.reload_timer = Timer(400, func=lambda: self.player.game.play_sound('sniper_reload'))
         
     def load_surf(self):
         return pygame.image.load(join('images', 'guns', 'sniper.png')).convert_alpha()
     
+    def kill(self):
+        self.reload_timer.cancel()
+        super().kill()
+    
     def create_bulet(self):
         if not self.cooldown_timer:
             self.player.game.play_sound('sniper_shot')
-            self.reload_timer = Timer(400, False, True, lambda: self.player.game.play_sound('sniper_reload'))
-            Bullet((self.all_sprites, self.bullet_sprites), self.rect.center+self.player_direction*10, self.bullet_surf, self.player_direction, self.damage, lifetime=2000, speed=3000)
+            self.reload_timer.activate()
+            self.player.game.bullet_pool.acquire((self.all_sprites, self.bullet_sprites), self.rect.center+self.player_direction*10, self.bullet_surf, self.player_direction, self.damage, lifetime=2000, speed=3000)
             self.cooldown_timer.activate()
             
             
-    def update(self, dt):
-        super().update(dt)
-        self.cooldown_timer.update()
-        if hasattr(self, 'reload_timer'):
-            self.reload_timer.update()
   
         
 class MachineGun(Gun):
     gun_name = 'machine-gun'
-    description = get_info(gun_name)['description']
-    price = get_info(gun_name)['price']
+    description = GunSetting('description')
+    price = GunSetting('price')
     def __init__(self, groups, player):
         self.all_sprites, self.bullet_sprites = groups
         super().__init__(self.all_sprites, player)
@@ -747,9 +767,5 @@ class MachineGun(Gun):
     def create_bulet(self):
         if not self.cooldown_timer:
             self.player.game.play_sound('machine-gun_shot')
-            Bullet((self.all_sprites, self.bullet_sprites), self.rect.center+self.player_direction*10, self.bullet_surf, self.player_direction, self.damage, lifetime=1000, speed=600)
+            self.player.game.bullet_pool.acquire((self.all_sprites, self.bullet_sprites), self.rect.center+self.player_direction*10, self.bullet_surf, self.player_direction, self.damage, lifetime=1000, speed=600)
             self.cooldown_timer.activate()
-            
-    def update(self, dt):
-        super().update(dt)
-        self.cooldown_timer.update()
\ No newline at end of file
@@ -3,8 +3,11 @@ from sprites import *
 from tilemap import Tilemap
 from support import *
 from ui import *
-
-from random import choice
+from inputs import inputs
+from config import config
+from spawner import SpawnScheduler
+from perf import perf
+from memtrack import memtrack
 
 class InGameStats:
     def __init__(self, game):
@@ -18,6 +21,11 @@ class InGameStats:
         self.prev_enemies_count = self.enemies_counter = 0
         self.wave_active = False
         
+        # wave report
+        self.damage_taken = 0
+        self.wave_summaries = []
+        self.start_wave_report()
+        
         # upgrades
         self.heal_price = 30
         
@@ -27,7 +35,7 @@ class InGameStats:
         self.health_upgrade_price = 30
         self.health_price_step = 10
         
-        self.damage_upgrade = load_json(join('settings', 'gun_settings.json'))['base_damage']
+        self.damage_upgrade = config.base_damage
         self.damage_upgrade_step = 4
         self.damage_level = (self.damage_upgrade - 50) // self.damage_upgrade_step + 1
         self.damage_upgrade_price = 40
@@ -58,13 +66,45 @@ class InGameStats:
         self.next_damage_upgrade_price = self.damage_upgrade_price + (self.damage_level) * self.damage_price_step
         self.next_speed_upgrade_price = self.speed_upgrade_price + (self.speed_level) * self.speed_price_step
     
+    def start_wave_report(self):
+        self.wave_start_time = self.game.sim_clock.get_ticks()
+        self.wave_start_kills = self.kills
+        self.wave_start_damage = self.damage_taken
+        self.peaks = {'enemies': 0, 'enemy_bullets': 0, 'bullets': 0, 'sprites': 0}
+
+    def track_peaks(self):
+        groups = {
+            'enemies': self.game.enemy_sprites,
+            'enemy_bullets': self.game.enemies_bullet_sprites,
+            'bullets': self.game.bullet_sprites,
+            'sprites': self.game.all_sprites
+        }
+        for name, group in groups.items():
+            self.peaks[name] = max(self.peaks[name], len(group))
+
+    def wave_summary(self, cleared=True):
+        '''
+        итог текущей волны: убийства, полученный урон, время в секундах симуляции, пиковое число объектов
+        и статистика использованных пулов с начала игры
+        '''
+        return {
+            'wave': self.wave,
+            'cleared': cleared,
+            'kills': self.kills - self.wave_start_kills,
+            'damage_taken': self.damage_taken - self.wave_start_damage,
+            'time_to_clear': round((self.game.sim_clock.get_ticks() - self.wave_start_time) / 1000, 2),
+            'health': max(self.health, 0),
+            'peaks': dict(self.peaks),
+            'pools': [pool.stats() for pool in self.game.pools() if pool.acquired]
+        }
+
     def update(self):
         self.health = self.game.player.health
         
         self.prev_enemies_count = self.enemies_counter
         self.enemies_counter = len(self.game.enemy_sprites)
         if self.prev_enemies_count > self.enemies_counter:
-            self.money += random.randint(15, 20) * (self.prev_enemies_count - self.enemies_counter)
+            self.money += rng.get('loot').randint(15, 20) * (self.prev_enemies_count - self.enemies_counter)
             self.kills += self.prev_enemies_count - self.enemies_counter
 
 
@@ -73,6 +113,7 @@ class Gameplay:
     music_state = 'gameplay'
     def __init__(self, game):
         self.game = game
+        self.spawns = SpawnScheduler(self.game.enemy_pools, self.spawn_enemy, self.prepare_enemies)
 
     def on_enter(self):
         if not hasattr(self.game, 'player'):
@@ -88,7 +129,7 @@ class Gameplay:
 
 
     def input(self):
-        keys = pygame.key.get_just_pressed()
+        keys = inputs.get_just_pressed()
 
         if keys[pygame.K_ESCAPE]:
             self.game.change_state('pause', False)
@@ -114,6 +155,11 @@ class Gameplay:
         if keys[pygame.K_4]:
             self.game.change_gun(MachineGun.gun_name)
             print(MachineGun.gun_name)
+        
+        # скорость симуляции: замедление, обычная, перемотка
+        for key, time_scale in ((pygame.K_F5, 0.25), (pygame.K_F6, 1), (pygame.K_F7, 4), (pygame.K_F8, 16)):
+            if keys[key]:
+                self.game.sim_clock.time_scale = time_scale
 
             
     def draw_game_ui(self):
@@ -123,7 +169,7 @@ class Gameplay:
         font = pygame.font.Font(None, 28)
         bar_width, bar_height = 200, 30
         x, y = 20, 20
-        health = self.game.player.health
+        health = max(self.game.player.health, 0)
         max_health = self.game.player.max_health if hasattr(self.game.player, 'max_health') else 100
 
         # задний фон
@@ -149,6 +195,8 @@ class Gameplay:
 
     def starting_wave(self):
         self.game_stats.wave_active = True
+        self.game_stats.start_wave_report()
+        memtrack.wave_start()
         # draw wave number
         surface = pygame.display.get_surface()
         font = self.game.l_font
@@ -158,53 +206,65 @@ class Gameplay:
         self.game.play_sound('tick')
         
         # starting wave
-        wave_settings:dict = load_json('settings/waves.json')[str(self.game_stats.wave)]
-        self.boss_wave = wave_settings.get('boss', False)
-        
-        enemies_dict = {
-            NormalEnemy.name: NormalEnemy,
-            FastEnemy.name: FastEnemy,
-            HeavyEmemy.name: HeavyEmemy,
-            FirstBoss.name: FirstBoss
-        }
-        wave_multipliers = wave_settings['enemies_multiplier']
+        self.wave_settings = config.wave(self.game_stats.wave)
+        self.boss_wave = self.wave_settings.boss
+        self.prewarm_pools()
         
         # spawn enemies
-        self.spawn_timers: list[Timer] = []
-        for enemy_name, enemy_num in wave_settings['enemies'].items():
+        now = self.game.sim_clock.get_ticks()
+        for enemy_name, enemy_num in self.wave_settings.enemies.items():
             for _ in range(enemy_num):
-                
-                # Фильтруем спавнеры, оставляя только те, что далеко от игрока
-                def _choice_spawner(min_distance=600, boss=False):
-                    if boss:
-                        return self.game.tilemap.boss_spawner()
-                    
-                    player_pos = self.game.player.rect.center
-                    spawners = [
-                        pos for pos in self.game.tilemap.enemy_spawner()
-                        if ((pos[0] - player_pos[0]) ** 2 + (pos[1] - player_pos[1]) ** 2) ** 0.5 > min_distance
-                    ]
-                    if not spawners:
-                        spawners = self.game.tilemap.enemy_spawner()
-                    spawner = choice(spawners)
-                    return spawner
-                
-                self.spawn_timers.append(Timer(
-                    random.randint(1000, self.game_stats.wave * 1000), 
-                    False, 
-                    True, 
-                    lambda enemy_name = enemy_name: enemies_dict[enemy_name]((
-                        self.game.all_sprites, self.game.enemy_sprites), 
-                        _choice_spawner(700, enemies_dict[enemy_name].boss),
-                        self.game.enemies_frames_dict[enemy_name],
-                        self.game.player,
-                        self.game.collision_sprites,
-                        health_multiplier=wave_multipliers['health'],
-                        speed_multiplier=wave_multipliers['speed'],
-                        damage_multiplier=wave_multipliers['damage'],
-                        game=self.game
-                        )))
-        
+                self.spawns.push(now + rng.get('spawn').randint(1000, self.game_stats.wave * 1000), enemy_name)
+    
+    def choice_spawner(self, min_distance=600, boss=False):
+        '''спавнер подальше от игрока'''
+        if boss:
+            return self.game.tilemap.boss_spawner()
+        return self.game.tilemap.enemy_spawns.random_far_from(self.game.player.rect.center, min_distance, rng.get('spawn'))
+    
+    def spawn_enemy(self, enemy_name):
+        multipliers = self.wave_settings.multipliers
+        self.game.enemy_pools[enemy_name].acquire((
+            self.game.all_sprites, self.game.enemy_sprites), 
+            self.choice_spawner(700, ENEMIES[enemy_name].boss),
+            self.game.enemies_frames_dict[enemy_name],
+            self.game.player,
+            self.game.collision_sprites,
+            health_multiplier=multipliers.health,
+            speed_multiplier=multipliers.speed,
+            damage_multiplier=multipliers.damage,
+            game=self.game
+            )
+    
+    def prepare_enemies(self, enemy_name, count):
+        '''врагов заранее строит SpawnScheduler в шаги без спавнов'''
+        self.game.enemy_pools[enemy_name].prewarm(
+            count,
+            (self.game.all_sprites, self.game.enemy_sprites),
+            (0, 0),
+            self.game.enemies_frames_dict[enemy_name],
+            self.game.player,
+            self.game.collision_sprites,
+            game=self.game
+        )
+    
+    def prewarm_pools(self):
+        '''заполняем пулы пуль до начала волны, чтобы не создавать объекты во время боя'''
+        self.game.bullet_pool.prewarm(
+            64,
+            (self.game.all_sprites, self.game.bullet_sprites),
+            (0, 0),
+            self.game.current_gun.bullet_surf,
+            pygame.Vector2(1, 0)
+        )
+        if self.boss_wave:
+            self.game.enemy_bullet_pool.prewarm(
+                256,
+                (self.game.all_sprites, self.game.enemies_bullet_sprites),
+                (0, 0),
+                self.game.enemy_bullet_surf,
+                pygame.Vector2(1, 0)
+            )
     
     def ending_wave(self):
         self.game_stats.wave_active = False
@@ -218,27 +278,38 @@ class Gameplay:
         self.fade_text.start()
         
         # go to shop
+        self.game_stats.wave_summaries.append(self.game_stats.wave_summary())
+        memtrack.wave_end(self.game_stats.wave)
         self.game_stats.wave += 1
         self.ending_wave_timer = Timer(2000, False, True, lambda: self.game.change_state('shop'))
     
                 
     def collision(self):
-        # пули игрока с врагами
-        for bullet in self.game.bullet_sprites:
-            sprite_collision = pygame.sprite.spritecollide(bullet, self.game.enemy_sprites, False, pygame.sprite.collide_mask)
-            if sprite_collision:
+        # пули игрока с врагами: rect всех врагов собираются один раз за шаг,
+        # collidelistall по rect всего пути пули отсекает дальних врагов, точная проверка - только у оставшихся
+        enemies = self.game.enemy_sprites.sprites()
+        enemy_rects = [enemy.rect for enemy in enemies]
+        checks = 0
+        for bullet in self.game.bullet_sprites.sprites():
+            candidates = [enemies[i] for i in bullet.swept_rect().collidelistall(enemy_rects)]
+            checks += len(candidates)
+            hits = bullet.first_hits(candidates)
+            if hits:
                 bullet.kill()
-                for sprite in sprite_collision:
+                for sprite in hits:
                     if sprite.collision_active:
                         sprite.take_damage(bullet.damage)
 
         # пули врагов с игроком
-        sprite_collision = pygame.sprite.spritecollide(self.game.player, self.game.enemies_bullet_sprites, True, pygame.sprite.collide_mask)
-        damage = 50
-        if self.game.enemies_bullet_sprites:
-            damage = list(self.game.enemies_bullet_sprites)[0].damage
-        if sprite_collision:
-            self.game.player.take_damage(damage=damage)
+        player = self.game.player
+        candidates = [bullet for bullet in self.game.enemies_bullet_sprites.sprites() if bullet.swept_rect().colliderect(player.rect)]
+        checks += len(candidates)
+        perf.count('checks', checks)
+        hits = [bullet for bullet in candidates if bullet.hit_distance(player) is not None]
+        for bullet in hits:
+            bullet.kill()
+        if hits:
+            player.take_damage(damage=hits[0].damage)
                              
         # враги с игроком
         for enemy in self.game.enemy_sprites:
@@ -258,37 +329,31 @@ class Gameplay:
     
            
     def draw(self):
-        self.game.all_sprites.draw(self.game.player.rect.center)
-        self.draw_game_ui()
+        with perf.probe('draw'):
+            self.game.all_sprites.draw(self.game.player.rect.center)
+        with perf.probe('ui'):
+            self.draw_game_ui()
         
         if hasattr(self, 'fade_text'):
             self.fade_text.update(self.game.display_surface)
 
-        if hasattr(self, 'spawn_timers') and not self.spawn_timers and self.game_stats.enemies_counter == 0 and self.game_stats.wave_active and not self.game.enemy_sprites:
-            self.ending_wave()
-
             
     def update(self, dt):
         self.input()
+
+    def step(self, dt):
+        '''шаг симуляции, вызывается из Game.run по часам симуляции'''
+        self.spawns.update(self.game.sim_clock.get_ticks())
+        self.game.enemy_swarm.update(dt, self.game.player.rect.center)
         self.game_stats.update()
-        self.collision()
+        with perf.probe('collision'):
+            self.collision()
         self.check_player_alive()
         
-        # timers
-        self.starting_wave_timer.update()
-        
-        if hasattr(self, 'ending_wave_timer'):
-            self.ending_wave_timer.update()
-        
-        if hasattr(self, 'game_over_timer'):
-            self.game_over_timer.update()    
-        
-        
-        if hasattr(self, 'spawn_timers'):
-            for timer in self.spawn_timers:
-                timer.update()
-                if not timer: 
-                    self.spawn_timers.remove(timer)
+        if self.game_stats.wave_active:
+            self.game_stats.track_peaks()
+            if not self.spawns and self.game_stats.enemies_counter == 0 and not self.game.enemy_sprites:
+                self.ending_wave()
                     
 
 class InGameWindow:
@@ -361,14 +426,13 @@ class Pause(InGameWindow):
         )
 
     def input(self):
-        keys = pygame.key.get_just_pressed()
+        keys = inputs.get_just_pressed()
         if keys[pygame.K_ESCAPE] or self.resume_game_button.is_clicked():
             self.game.change_state('gameplay', False)
             self.game.game_paused = False
 
         if self.menu_button.is_clicked():
-            self.game.change_state('main_menu')
-            self.game.reset_game()
+            self.game.change_state('main_menu', on_swap=self.game.rebuild_world)
 
     def update(self, dt):
         super().update(dt)
@@ -495,6 +559,11 @@ class Shop(InGameWindow):
                 
                 if btn: self.buttons[row][col] = btn
 
+    def next_wave(self):
+        self.game.change_state('gameplay')
+        self.game.game_paused = False
+        self.game.gameplay.start_wave_timer()
+
     def can_buy(self, price):
         if price <= self.game.game_stats.money:
             self.game.game_stats.money -= price
@@ -510,9 +579,7 @@ class Shop(InGameWindow):
                 if btn and btn.is_clicked():
                     # Start wave
                     if btn.callback == 'next_wave':
-                        self.game.change_state('gameplay')
-                        self.game.game_paused = False
-                        self.game.gameplay.start_wave_timer()
+                        self.next_wave()
                         
                     # heal player
                     if btn.callback == 'heal_player':
@@ -566,7 +633,7 @@ class Shop(InGameWindow):
                         # обновляем иконки
                         self.update_gun_buttons_icons()
         
-        if pygame.key.get_just_pressed()[pygame.K_t]:
+        if inputs.get_just_pressed()[pygame.K_t]:
             self.game.game_stats.money += 100                    
 
     def update_gun_buttons_icons(self):
@@ -722,8 +789,7 @@ class GameOver(InGameWindow):
         
     def input(self):
         if self.menu_button.is_clicked():
-            self.game.change_state('main_menu')
-            self.game.reset_game()
+            self.game.change_state('main_menu', on_swap=self.game.rebuild_world)
 
     def draw_stats(self):
         
@@ -1,6 +1,7 @@
 from settings import *
 from ui import *
 from support import *
+from inputs import inputs
 
 import pygame
 import json
@@ -221,7 +222,7 @@ class Settings(MainMenu):
 
 
     def input(self):
-        keys = pygame.key.get_just_pressed()
+        keys = inputs.get_just_pressed()
 
         if keys[pygame.K_ESCAPE] or self.back_to_menu_button.is_clicked():
             self.game.change_state('main_menu')
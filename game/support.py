@@ -2,40 +2,208 @@ from settings import *
 import time
 import json
 import os
+from heapq import heappush, heappop, heapify
+from math import ceil
+
+
+class SimClock:
+	"""
+	Время симуляции в мс. Двигается только главным циклом через steps(dt):
+	на паузе стоит, time_scale замедляет или ускоряет игру.
+	Длинный кадр режется на шаги не длиннее max_step, чтобы на 16x ничего не проскакивало сквозь стены.
+	"""
+
+	def __init__(self, time_scale = 1.0, max_step = 1 / 30):
+		self.now = 0.0
+		self.time_scale = time_scale
+		self.paused = False
+		self.max_step = max_step
+
+	def get_ticks(self):
+		return self.now
+
+	def reset(self):
+		self.now = 0.0
+
+	def steps(self, dt):
+		"""шаги кадра; пауза, поставленная посреди кадра (из шага), обрывает оставшиеся шаги"""
+		sim_dt = dt * self.time_scale
+		count = max(ceil(sim_dt / self.max_step - 1e-9), 1)
+		step = sim_dt / count
+		for _ in range(count):
+			if self.paused:
+				return
+			self.now += step * 1000
+			yield step
+
+sim_clock = SimClock()
+
+
+class RandomStreams:
+	"""
+	Свой random.Random на каждую подсистему, все выводятся из одного сида прогона.
+	Так тряска камеры или звук шагов не сдвигают последовательность спавна и атак.
+	"""
+
+	def __init__(self, seed = None):
+		self.seed(seed)
+
+	def seed(self, seed = None):
+		self.base_seed = seed if seed is not None else random.randrange(2**32)
+		self.streams = {}
+
+	def get(self, name):
+		stream = self.streams.get(name)
+		if stream is None:
+			stream = self.streams[name] = random.Random(f'{self.base_seed}:{name}')
+		return stream
+
+rng = RandomStreams()
+
+
+class TimerHandle:
+	__slots__ = ('due', 'order', 'callback', 'interval', 'active')
+
+	def __init__(self, due, order, callback, interval):
+		self.due = due
+		self.order = order
+		self.callback = callback
+		self.interval = interval
+		self.active = True
+
+	def __lt__(self, other):
+		return (self.due, self.order) < (other.due, other.order)
+
+
+class Scheduler:
+	"""
+	Общий планировщик таймеров - куча по времени срабатывания.
+	advance(now) вызывается раз в кадр и запускает только то, что уже пора,
+	неактивные таймеры ничего не стоят.
+	"""
+
+	def __init__(self, time_source = sim_clock.get_ticks):
+		self.time_source = time_source
+		self.queue = []
+		self.order = 0
+		self.pending = 0
+
+	def __len__(self):
+		return self.pending
+
+	def now(self):
+		return self.time_source()
+
+	def schedule(self, delay, callback, repeat = False):
+		self.order += 1
+		handle = TimerHandle(self.now() + delay, self.order, callback, delay if repeat else None)
+		heappush(self.queue, handle)
+		self.pending += 1
+		return handle
+
+	def cancel(self, handle):
+		if handle.active:
+			handle.active = False
+			self.pending -= 1
+			# отменённые записи лежат в куче до своего времени, чистим если их стало слишком много
+			if len(self.queue) > 64 and len(self.queue) > self.pending * 4:
+				self.queue = [handle for handle in self.queue if handle.active]
+				heapify(self.queue)
+
+	def advance(self, now):
+		queue = self.queue
+		while queue and queue[0].due <= now:
+			handle = heappop(queue)
+			if not handle.active:
+				continue
+			if handle.interval is not None:
+				handle.due += handle.interval
+				heappush(queue, handle)
+			else:
+				handle.active = False
+				self.pending -= 1
+			handle.callback()
+
+	def clear(self):
+		for handle in self.queue:
+			handle.active = False
+		self.queue = []
+		self.pending = 0
+
+scheduler = Scheduler()
 
 
 class Timer:
 
-	def __init__(self, duration, repeat = False, autostart = False, func = None):
+	def __init__(self, duration, repeat = False, autostart = False, func = None, scheduler = scheduler):
 		self.duration = duration
-		self.start_time = 0
-		self.active = False
 		self.repeat = repeat
 		self.func = func
+		self.scheduler = scheduler
+		self.handle = None
 		
 		if autostart:
 			self.activate()
 
 	def __bool__(self):
-		return self.active
+		return self.handle is not None and self.handle.active
+
+	@property
+	def active(self):
+		return bool(self)
 
 	def activate(self):
-		self.active = True
-		self.start_time = pygame.time.get_ticks()
+		self.cancel()
+		self.handle = self.scheduler.schedule(self.duration, self.fire)
 
 	def deactivate(self):
-		self.active = False
-		self.start_time = 0
+		self.cancel()
 		if self.repeat:
 			self.activate()
 
-	def update(self):
-		if self.active:
-			if pygame.time.get_ticks() - self.start_time >= self.duration:
-				if self.func and self.start_time != 0: self.func()
-				self.deactivate()
+	def cancel(self):
+		if self.handle:
+			self.scheduler.cancel(self.handle)
+			self.handle = None
+
+	def fire(self):
+		handle = self.handle
+		if self.func: self.func()
+		# func мог сам перезапустить таймер
+		if self.handle is handle:
+			self.handle = None
+			if self.repeat:
+				self.activate()
     
 
+class FrameCache:
+	"""
+	Маски и отражённые копии кадров, посчитанные один раз на кадр анимации.
+	Ключ - сам Surface кадра, поэтому кэшировать можно только общие кадры из загрузки (load_assets), а не временные
+	или загружаемые заново поверхности - кэш держит их до конца игры.
+	"""
+	def __init__(self):
+		self.masks = {}
+		self.flips = {}
+
+	def mask(self, surf):
+		mask = self.masks.get(surf)
+		if mask is None:
+			mask = self.masks[surf] = pygame.mask.from_surface(surf)
+		return mask
+
+	def flipped(self, surf):
+		flip = self.flips.get(surf)
+		if flip is None:
+			flip = self.flips[surf] = pygame.transform.flip(surf, True, False)
+		return flip
+
+	def clear(self):
+		self.masks.clear()
+		self.flips.clear()
+
+frame_cache = FrameCache()
+
 def folder_importer(*path):
 	surfs = {}
 	for folder_path, _, file_names in walk(join(*path)):
@@ -44,54 +212,75 @@ def folder_importer(*path):
 			surfs[file_name.split('.')[0]] = pygame.image.load(full_path).convert_alpha()
 	return surfs
 
-def audio_importer(*path): 
-	audio_dict = {}
-	for folder_path, _, file_names in walk(join(*path)):
-		for file_name in file_names:
-			audio_dict[file_name.split('.')[0]] = pygame.mixer.Sound(join(folder_path, file_name))
-	return audio_dict
-
-def transition_effect(surface: pygame.Surface, callback: callable, fade_speed=20, hold_time=0.3, draw_callback=None):
-    clock = pygame.time.Clock()
-    fade_overlay = pygame.Surface(surface.get_size()).convert_alpha()
-
-    # затемнение
-    for alpha in range(0, 256, fade_speed):
-        if draw_callback:
-            draw_callback()  
-        fade_overlay.fill((0, 0, 0, alpha))
-        surface.blit(fade_overlay, (0, 0))
-        pygame.display.update()
-        clock.tick(60)
-
-    # фкнции
-    callback()
-
-    # Задержка
-    fade_overlay.fill((0, 0, 0, 255))
-    surface.blit(fade_overlay, (0, 0))
-    pygame.display.update()
-    start_time = time.time()
-    while time.time() - start_time < hold_time:
-        clock.tick(60)
-
-    # осветление
-    for alpha in range(255, -1, -fade_speed):
-        if draw_callback:
-            draw_callback() 
-        fade_overlay.fill((0, 0, 0, alpha))
-        surface.blit(fade_overlay, (0, 0))
-        pygame.display.update()
-        clock.tick(60)
-    
+class Transition:
+	"""
+	Переход между состояниями без своего цикла: затемнение, смена состояния, пауза на чёрном, осветление.
+	Главный цикл двигает его через update(dt) и рисует поверх кадра через draw(surface),
+	так что события, ввод и звук продолжают обрабатываться.
+	callback (смена состояния и тяжёлая работа вроде rebuild_world) вызывается, когда экран уже чёрный.
+	"""
+
+	def __init__(self, size, fade_time = 0.22, hold_time = 0.3):
+		# один чёрный overlay на весь переход, меняется только его alpha
+		self.overlay = pygame.Surface(size).convert()
+		self.overlay.fill('black')
+		self.fade_time = fade_time
+		self.hold_time = hold_time
+		self.phase = None  # 'out', 'hold', 'in'
+		self.callback = None
+		self.elapsed = 0
+		self.alpha = 0
+
+	def __bool__(self):
+		return self.phase is not None
+
+	@property
+	def covered(self):
+		"""экран полностью закрыт - состояние под ним можно не рисовать"""
+		return self.alpha == 255
+
+	def start(self, callback):
+		if self.phase in (None, 'in'):
+			# из середины осветления затемняем с текущей яркости
+			self.elapsed = self.alpha / 255 * self.fade_time
+			self.phase = 'out'
+		# новый переход до смены состояния заменяет прежний
+		self.callback = callback
+
+	def update(self, dt):
+		if self.phase is None:
+			return
+		self.elapsed += dt
+
+		if self.phase == 'out':
+			self.alpha = min(int(255 * self.elapsed / self.fade_time), 255)
+			if self.elapsed >= self.fade_time:
+				self.phase, self.elapsed, self.alpha = 'hold', 0, 255
+				callback, self.callback = self.callback, None
+				callback()
+		elif self.phase == 'hold':
+			if self.elapsed >= self.hold_time:
+				self.phase, self.elapsed = 'in', 0
+		else:
+			self.alpha = max(255 - int(255 * self.elapsed / self.fade_time), 0)
+			if self.elapsed >= self.fade_time:
+				self.phase, self.alpha = None, 0
+
+	def draw(self, surface):
+		if self.covered:
+			surface.fill('black')
+		elif self.alpha:
+			self.overlay.set_alpha(self.alpha)
+			surface.blit(self.overlay, (0, 0))
         
+
 class FadeText:
 	"""
 	Класс для плавного появления и исчезновения текста без блокировки основного цикла игры.
 	Используйте методы start() и update(surface) в игровом цикле.
 	"""
 
-	def __init__(self, text, font, color, pos, appear_speed=5, hold_time=1.0, disappear_speed=5, background_draw=None):
+	def __init__(self, text, font, color, pos, appear_speed=5, hold_time=1.0, disappear_speed=5, background_draw=None, clock=sim_clock):
 		self.text = text
 		self.font = font
 		self.color = color
@@ -100,6 +289,7 @@ class FadeText:
 		self.hold_time = hold_time
 		self.disappear_speed = disappear_speed
 		self.background_draw = background_draw
+		self.clock = clock
 
 		self.base_surf = self.font.render(self.text, True, self.color)
 		self.text_surf = self.base_surf.convert_alpha()
@@ -112,7 +302,7 @@ class FadeText:
 	def start(self):
 		self.state = 'appearing'
 		self.alpha = 0
-		self.start_time = time.time()
+		self.start_time = self.clock.get_ticks()
 
 	def update(self, surface):
 		if self.state == 'idle' or self.state == 'done':
@@ -121,25 +311,26 @@ class FadeText:
 		if self.background_draw:
 			self.background_draw()
 
+		# скорости заданы в единицах альфы за кадр при FRAMERATE, считаем их от времени симуляции
+		elapsed = (self.clock.get_ticks() - self.start_time) / 1000
 		if self.state == 'appearing':
-			self.alpha += self.appear_speed
+			self.alpha = min(int(elapsed * FRAMERATE * self.appear_speed), 255)
 			if self.alpha >= 255:
-				self.alpha = 255
 				self.state = 'holding'
-				self.start_time = time.time()
+				self.start_time = self.clock.get_ticks()
 			self.text_surf.set_alpha(self.alpha)
 			surface.blit(self.text_surf, self.text_rect)
 
 		elif self.state == 'holding':
 			self.text_surf.set_alpha(255)
 			surface.blit(self.text_surf, self.text_rect)
-			if time.time() - self.start_time >= self.hold_time:
+			if elapsed >= self.hold_time:
 				self.state = 'disappearing'
+				self.start_time = self.clock.get_ticks()
 
 		elif self.state == 'disappearing':
-			self.alpha -= self.disappear_speed
+			self.alpha = max(255 - int(elapsed * FRAMERATE * self.disappear_speed), 0)
 			if self.alpha <= 0:
-				self.alpha = 0
 				self.state = 'done'
 			self.text_surf.set_alpha(self.alpha)
 			surface.blit(self.text_surf, self.text_rect)
@@ -0,0 +1,177 @@
+from settings import *
+import numpy as np
+
+
+def separation_forces(positions, radius, max_neighbours=8):
+    '''
+    Сила расталкивания для каждой точки (N, 2) от соседей ближе radius.
+    Точки раскладываются по сетке с шагом radius, каждая проверяет только свою и 8 соседних клеток,
+    а в каждой клетке - не больше max_neighbours первых точек: плотная куча стоит O(N * max_neighbours), а не O(N²)
+    '''
+    count = len(positions)
+    forces = np.zeros((count, 2))
+    if count < 2:
+        return forces
+
+    cells = np.floor(positions / radius).astype(np.int64)
+    row = 1 << 32
+    keys = cells[:, 0] * row + cells[:, 1]
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    indices = np.arange(count)
+
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            neighbour_keys = keys + dx * row + dy
+            start = np.searchsorted(sorted_keys, neighbour_keys, 'left')
+            end = np.searchsorted(sorted_keys, neighbour_keys, 'right')
+            counts = end - start
+
+            # k-й сосед в клетке для всех точек сразу, каждая точка встречается один раз за проход
+            for k in range(min(counts.max(), max_neighbours)):
+                has = counts > k
+                i = indices[has]
+                j = order[start[has] + k]
+                offset = positions[i] - positions[j]
+                dist = np.hypot(offset[:, 0], offset[:, 1])
+                close = (i != j) & (dist < radius)
+                i, j, offset, dist = i[close], j[close], offset[close], dist[close]
+
+                # совпавшие точки разводим по золотому углу
+                same = dist == 0
+                angle = i[same] * 2.39996
+                offset[same] = np.stack((np.cos(angle), np.sin(angle)), axis=1)
+                dist[same] = 1
+
+                forces[i] += offset / dist[:, None] * (1 - dist / radius)[:, None]
+    return forces
+
+
+class EnemySwarm:
+    '''
+    Движение всех врагов за один проход NumPy.
+    Позиции, скорости и состояния врагов хранятся в массивах по слотам,
+    направление берётся из общего FlowField с расталкиванием соседей, а поштучная обработка
+    столкновений (Enemy.move) остаётся только для врагов рядом с препятствиями.
+    '''
+
+    def __init__(self, collision_sprites, flow_field, separation_radius=48, separation_weight=1.5, cell_size=TILE_SIZE, capacity=64):
+        self.cell_size = cell_size
+        self.collision_sprites = collision_sprites
+        self.flow_field = flow_field
+        self.direct_distance = cell_size * 1.5
+        self.separation_radius = separation_radius
+        self.separation_weight = separation_weight
+
+        self.enemies = []
+        self.free_slots = []
+        self.pos = np.zeros((0, 2))
+        self.direction = np.zeros((0, 2))
+        self.speed = np.zeros(0)
+        self.active = np.zeros(0, dtype=bool)
+        self.large = np.zeros(0, dtype=bool)
+        self.grow(capacity)
+
+        self.build_obstacle_grid()
+
+    def grow(self, capacity):
+        old = len(self.enemies)
+        self.enemies.extend([None] * (capacity - old))
+        self.free_slots.extend(range(capacity - 1, old - 1, -1))
+        self.pos = np.resize(self.pos, (capacity, 2))
+        self.direction = np.resize(self.direction, (capacity, 2))
+        self.speed = np.resize(self.speed, capacity)
+        self.active = np.resize(self.active, capacity)
+        self.large = np.resize(self.large, capacity)
+        self.active[old:] = False
+
+    def build_obstacle_grid(self):
+        '''
+        near[x, y] - в клетке или по соседству есть препятствие,
+        obstacles[(x, y)] - препятствия, которые могут задеть врага с центром в этой клетке
+        '''
+        rects = [sprite.rect for sprite in self.collision_sprites]
+        right = max((rect.right for rect in rects), default=0)
+        bottom = max((rect.bottom for rect in rects), default=0)
+        self.cols = int(right // self.cell_size) + 2
+        self.rows = int(bottom // self.cell_size) + 2
+        self.near = np.zeros((self.cols, self.rows), dtype=bool)
+        self.obstacles = {}
+
+        for sprite in self.collision_sprites:
+            left = max(int(sprite.rect.left // self.cell_size) - 1, 0)
+            top = max(int(sprite.rect.top // self.cell_size) - 1, 0)
+            right = min(int(sprite.rect.right // self.cell_size) + 1, self.cols - 1)
+            bottom = min(int(sprite.rect.bottom // self.cell_size) + 1, self.rows - 1)
+            self.near[left:right + 1, top:bottom + 1] = True
+            for x in range(left, right + 1):
+                for y in range(top, bottom + 1):
+                    self.obstacles.setdefault((x, y), []).append(sprite)
+
+    def cell(self, pos):
+        x = min(max(int(pos[0] // self.cell_size), 0), self.cols - 1)
+        y = min(max(int(pos[1] // self.cell_size), 0), self.rows - 1)
+        return x, y
+
+    # ===== slots =====
+    def add(self, enemy):
+        if not self.free_slots:
+            self.grow(len(self.enemies) * 2)
+        slot = self.free_slots.pop()
+        self.enemies[slot] = enemy
+        self.pos[slot] = enemy.hitbox_rect.center
+        self.direction[slot] = 0
+        self.speed[slot] = enemy.speed
+        self.active[slot] = True
+        self.large[slot] = max(enemy.hitbox_rect.size) > self.cell_size * 2
+        return slot
+
+    def remove(self, slot):
+        self.enemies[slot] = None
+        self.active[slot] = False
+        self.free_slots.append(slot)
+
+    # ===== movement =====
+    def update(self, dt, target):
+        slots = np.flatnonzero(self.active)
+        if not slots.size:
+            return
+
+        # направление к игроку для всех сразу: по полю, а вблизи игрока - напрямую
+        self.flow_field.update(target)
+        pos = self.pos[slots]
+        steer = np.asarray(target, dtype=float) - pos
+        dist = np.hypot(steer[:, 0], steer[:, 1])
+        np.divide(steer, dist[:, None], out=steer, where=dist[:, None] > 0)
+        flow = self.flow_field.sample(pos)
+        direct = (dist < self.direct_distance) | ~flow.any(axis=1)
+        direction = np.where(direct[:, None], steer, flow)
+
+        # расталкивание, чтобы толпа не собиралась в одну точку
+        if self.separation_weight:
+            direction += separation_forces(pos, self.separation_radius) * self.separation_weight
+            length = np.hypot(direction[:, 0], direction[:, 1])
+            np.divide(direction, length[:, None], out=direction, where=length[:, None] > 1)
+        self.direction[slots] = direction
+
+        new_pos = pos + direction * (self.speed[slots] * dt)[:, None]
+        cells_x = np.clip((new_pos[:, 0] // self.cell_size).astype(int), 0, self.cols - 1)
+        cells_y = np.clip((new_pos[:, 1] // self.cell_size).astype(int), 0, self.rows - 1)
+        near = self.near[cells_x, cells_y] | self.large[slots]
+
+        # свободное движение - только запись результата в спрайты
+        free = ~near
+        self.pos[slots[free]] = new_pos[free]
+        for slot, (x, y), (dx, dy) in zip(slots[free].tolist(), new_pos[free].tolist(), direction[free].tolist()):
+            enemy = self.enemies[slot]
+            enemy.hitbox_rect.center = (x, y)
+            enemy.rect.center = (x, y)
+            enemy.direction.update(dx, dy)
+
+        # рядом с препятствиями - поштучно, как раньше
+        for slot, (dx, dy) in zip(slots[near].tolist(), direction[near].tolist()):
+            enemy = self.enemies[slot]
+            enemy.direction.update(dx, dy)
+            obstacles = None if self.large[slot] else self.obstacles.get(self.cell(enemy.hitbox_rect.center), ())
+            enemy.move(dt, obstacles)
+            self.pos[slot] = enemy.hitbox_rect.center
@@ -1,5 +1,38 @@
 from settings import *
 from sprites import Sprite
+import numpy as np
+
+
+class SpawnIndex:
+    '''
+    Точки спавна в массиве (N, 2): выбор случайной точки дальше R от позиции и ближайших N точек
+    за один векторный проход без сканирования карты.
+    '''
+
+    def __init__(self, points):
+        self.points = np.array(points, dtype=float).reshape(-1, 2)
+        self.positions = [tuple(point) for point in self.points.tolist()]
+
+    def __len__(self):
+        return len(self.positions)
+
+    def distances_squared(self, pos):
+        offset = self.points - pos
+        return offset[:, 0] ** 2 + offset[:, 1] ** 2
+
+    def random_far_from(self, pos, min_distance, random_stream):
+        '''случайная точка дальше min_distance от pos, если таких нет - любая'''
+        far = np.flatnonzero(self.distances_squared(pos) > min_distance ** 2)
+        if not far.size:
+            return self.positions[random_stream.randrange(len(self.positions))]
+        return self.positions[far[random_stream.randrange(far.size)]]
+
+    def nearest(self, pos, count=1):
+        '''count ближайших к pos точек, от ближней к дальней'''
+        distances = self.distances_squared(pos)
+        count = min(count, len(distances))
+        closest = np.argpartition(distances, count - 1)[:count]
+        return [self.positions[index] for index in closest[np.argsort(distances[closest])]]
 
 
 class Tilemap:
@@ -9,24 +42,29 @@ class Tilemap:
         self.map = load_pygame(join('data', 'maps', 'gameworld.tmx'))
         self.level_width = self.map.width * TILE_SIZE
         self.level_heigt = self.map.height * TILE_SIZE
+        self.load_spawners()
         
+    def load_spawners(self):
+        '''слой Entities читается один раз при загрузке карты'''
+        self.player_spawn = self.boss_spawn = None
+        enemy_spawns = []
+        for obj in self.map.get_layer_by_name('Entities'):
+            if obj.name == 'Player' and self.player_spawn is None:
+                self.player_spawn = (obj.x, obj.y)
+            elif obj.name == 'Boss' and self.boss_spawn is None:
+                self.boss_spawn = (obj.x, obj.y)
+            elif obj.name == 'Enemy':
+                enemy_spawns.append((obj.x, obj.y))
+        self.enemy_spawns = SpawnIndex(enemy_spawns)
     
     def player_spawner(self) -> tuple[int]:
-        for obj in self.map.get_layer_by_name('Entities'):
-            if obj.name == 'Player':
-                return (obj.x, obj.y)
+        return self.player_spawn
             
     def enemy_spawner(self):
-        spawners = []
-        for obj in self.map.get_layer_by_name('Entities'):
-            if obj.name == 'Enemy':
-                spawners.append((obj.x, obj.y))
-        return spawners
+        return self.enemy_spawns.positions
             
     def boss_spawner(self):
-        for obj in self.map.get_layer_by_name('Entities'):
-            if obj.name == 'Boss':
-                return (obj.x, obj.y)
+        return self.boss_spawn
         
     def setup(self):
         for x, y, image in self.map.get_layer_by_name('Ground').tiles():
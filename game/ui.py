@@ -1,4 +1,6 @@
 from settings import *
+from inputs import inputs
+from audio import audio
 
         
         
@@ -26,23 +28,19 @@ class Button(pygame.sprite.Sprite):
 
         self.rect = self.image.get_frect(center=pos)
 
-        # sounds
-        self.hover_sound = pygame.mixer.Sound(join('sounds', 'sounds', 'hover.mp3'))
-        self.click_sound = pygame.mixer.Sound(join('sounds', 'sounds', 'click.mp3'))
-
     def is_clicked(self):
-        mouse_pos = pygame.mouse.get_pos()
-        mouse_buttons = pygame.mouse.get_just_pressed()
+        mouse_pos = inputs.get_pos()
+        mouse_buttons = inputs.get_mouse_just_pressed()
         click = self.rect.collidepoint(mouse_pos) and mouse_buttons[0]
         if click:
-            self.click_sound.play()
+            audio.play('click')
             return click
 
     def hover(self):
-        mouse_pos = pygame.mouse.get_pos()
+        mouse_pos = inputs.get_pos()
         if self.rect.collidepoint(mouse_pos):
             if not hasattr(self, 'was_hovered') or not self.was_hovered:
-                self.hover_sound.play()
+                audio.play('hover')
             self.was_hovered = True
             if self.custom_image:
                 self.image = self.custom_image.copy()
@@ -149,8 +147,8 @@ class Slider(pygame.sprite.Sprite):
         return self.value
 
     def input(self):
-        mouse_pos = pygame.mouse.get_pos()
-        mouse_pressed = pygame.mouse.get_pressed()
+        mouse_pos = inputs.get_pos()
+        mouse_pressed = inputs.get_mouse_pressed()
 
         if self.dragging and not mouse_pressed[0]:
             self.dragging = False